@@ -1,6 +1,7 @@
 from common.metrics_handler import BaseVercelHandler, MetricsHandler
 from metrics.evm import (
     EthCallLatencyMetric,
+    HttpBatchLatencyMetric,
     HttpBlockNumberLatencyMetric,
     HttpGasPriceLatencyMetric,
     WsBlockLatencyMetric,
@@ -13,6 +14,13 @@ BASE_METRICS = [
     (HttpGasPriceLatencyMetric, "response_latency_seconds"),
 ]
 
+BASE_BATCH_METRICS = [
+    (WsBlockLatencyMetric, "response_latency_seconds"),
+    (HttpBatchLatencyMetric, "response_latency_seconds"),
+]
+
 
 class handler(BaseVercelHandler):
-    metrics_handler = MetricsHandler("Base", BASE_METRICS)
+    metrics_handler = MetricsHandler(
+        "Base", BASE_METRICS, batch_metrics=BASE_BATCH_METRICS
+    )
@@ -1,6 +1,7 @@
 from common.metrics_handler import BaseVercelHandler, MetricsHandler
 from metrics.evm import (
     EthCallLatencyMetric,
+    HttpBatchLatencyMetric,
     HttpBlockNumberLatencyMetric,
     HttpGasPriceLatencyMetric,
     WsBlockLatencyMetric,
@@ -13,6 +14,13 @@ ETHEREUM_METRICS = [
     (HttpGasPriceLatencyMetric, "response_latency_seconds"),
 ]
 
+ETHEREUM_BATCH_METRICS = [
+    (WsBlockLatencyMetric, "response_latency_seconds"),
+    (HttpBatchLatencyMetric, "response_latency_seconds"),
+]
+
 
 class handler(BaseVercelHandler):
-    metrics_handler = MetricsHandler("Ethereum", ETHEREUM_METRICS)
+    metrics_handler = MetricsHandler(
+        "Ethereum", ETHEREUM_METRICS, batch_metrics=ETHEREUM_BATCH_METRICS
+    )
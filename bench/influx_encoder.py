@@ -0,0 +1,79 @@
+"""InfluxEncoder against the previous f-string joining, at 100k points.
+
+Usage:
+    python -m bench.influx_encoder [points] [repeat]
+
+Both paths encode the same points: a tag set as produced by
+MetricLabels.get_influx_tags, the value field, and four HTTP phase fields.
+The previous path (one f-string per field, lines joined with "\\n") wrote
+no timestamps, used repr() for floats and did no escaping; the encoder
+adds timestamps, fixed-precision floats and escaping.
+"""
+
+import sys
+import time
+import timeit
+from typing import Dict, List, Tuple
+
+from common.influx import InfluxEncoder
+from common.metric_config import MetricLabels
+
+Point = Tuple[str, str, Dict[str, float], int]
+
+
+def build_points(count: int) -> List[Point]:
+    tags = [
+        MetricLabels(
+            "us-east-1", "default", "Ethereum", f"provider-{index}", "eth_call"
+        ).get_influx_tags()
+        for index in range(8)
+    ]
+    now = time.time_ns()
+    return [
+        (
+            "response_latency_seconds",
+            tags[index % len(tags)],
+            {
+                "value": 0.1 + index * 1e-6,
+                "dns_seconds": 0.0,
+                "connect_seconds": 0.012345678 + index * 1e-9,
+                "ttfb_seconds": 0.05,
+                "download_seconds": 0.000321,
+            },
+            now + index,
+        )
+        for index in range(count)
+    ]
+
+
+def encode_previous(points: List[Point]) -> str:
+    lines = []
+    for measurement, tags, fields, _ in points:
+        field_str = ",".join(f"{name}={value}" for name, value in fields.items())
+        lines.append(f"{measurement},{tags} {field_str}")
+    return "\n".join(lines)
+
+
+def encode_influx(points: List[Point]) -> str:
+    encoder = InfluxEncoder()
+    for measurement, tags, fields, timestamp_ns in points:
+        encoder.add(measurement, tags, fields, timestamp_ns)
+    return encoder.getvalue()
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    points = build_points(count)
+    print(f"{count} points, best of {repeat}")
+    for name, encode in (
+        ("previous f-string join", encode_previous),
+        ("InfluxEncoder", encode_influx),
+    ):
+        seconds = min(timeit.repeat(lambda: encode(points), number=1, repeat=repeat))
+        size = len(encode(points)) / 2**20
+        print(f"  {name:24} {seconds:.3f} s  {size:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Decode/encode speed of the JSON backends on Solana and EVM payloads.
+
+Usage:
+    python -m bench.json_codec [repeat]
+
+Times every installed backend (json, orjson, msgspec) on a jsonParsed
+Solana blockNotification and on EVM newHeads and eth_getBlockByNumber
+(full transactions) responses; `json_codec` is the backend this repo
+selects.
+"""
+
+import json
+import sys
+import timeit
+from typing import Callable, Dict, Tuple
+
+from bench.ws_compression import build_block
+from common import json_codec
+
+Codec = Tuple[Callable, Callable]
+
+
+def available_codecs() -> Dict[str, Codec]:
+    codecs: Dict[str, Codec] = {
+        "json": (json.loads, lambda obj: json.dumps(obj, separators=(",", ":"))),
+    }
+    try:
+        import orjson
+
+        codecs["orjson"] = (orjson.loads, orjson.dumps)
+    except ImportError:
+        pass
+    try:
+        import msgspec
+
+        codecs["msgspec"] = (msgspec.json.decode, msgspec.json.encode)
+    except ImportError:
+        pass
+    codecs[f"json_codec ({json_codec.BACKEND})"] = (
+        json_codec.loads,
+        json_codec.dumps_bytes,
+    )
+    return codecs
+
+
+def evm_header(number: int) -> dict:
+    return {
+        "number": hex(number),
+        "hash": f"0x{number:064x}",
+        "parentHash": f"0x{number - 1:064x}",
+        "timestamp": hex(1_700_000_000 + number),
+        "miner": "0x" + "95" * 20,
+        "gasLimit": "0x1c9c380",
+        "gasUsed": "0x1312d00",
+        "baseFeePerGas": "0x3b9aca00",
+        "logsBloom": "0x" + "00" * 256,
+        "stateRoot": f"0x{number * 3:064x}",
+        "receiptsRoot": f"0x{number * 5:064x}",
+        "transactionsRoot": f"0x{number * 7:064x}",
+        "extraData": "0x6265617665726275696c642e6f7267",
+    }
+
+
+def payloads() -> Dict[str, bytes]:
+    number = 19_000_000
+    block = evm_header(number)
+    block["transactions"] = [
+        {
+            "hash": f"0x{index:064x}",
+            "from": "0x" + f"{index:040x}",
+            "to": "0x" + "c0" * 20,
+            "nonce": hex(index),
+            "value": hex(10**17 + index),
+            "gas": "0x5208",
+            "maxFeePerGas": "0x4a817c800",
+            "maxPriorityFeePerGas": "0x3b9aca00",
+            "input": "0xa9059cbb" + "00" * 64,
+            "type": "0x2",
+            "v": "0x1",
+            "r": f"0x{index * 11:064x}",
+            "s": f"0x{index * 13:064x}",
+        }
+        for index in range(200)
+    ]
+    documents = {
+        "solana blockNotification": {
+            "jsonrpc": "2.0",
+            "method": "blockNotification",
+            "params": {
+                "subscription": 1,
+                "result": {
+                    "context": {"slot": 250_000_000},
+                    "value": {
+                        "slot": 250_000_000,
+                        "block": build_block(250_000_000, 1000),
+                    },
+                },
+            },
+        },
+        "evm newHeads": {
+            "jsonrpc": "2.0",
+            "method": "eth_subscription",
+            "params": {"subscription": "0xab", "result": evm_header(number)},
+        },
+        "evm eth_getBlockByNumber": {"jsonrpc": "2.0", "id": 1, "result": block},
+    }
+    return {name: json.dumps(doc).encode() for name, doc in documents.items()}
+
+
+def main() -> None:
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    codecs = available_codecs()
+    for name, raw in payloads().items():
+        print(f"{name}: {len(raw) / 1024:.1f} KiB")
+        document = json.loads(raw)
+        number = max(1, 20_000_000 // len(raw))
+        for codec_name, (loads, dumps) in codecs.items():
+            decode = min(
+                timeit.repeat(lambda: loads(raw), number=number, repeat=repeat)
+            )
+            encode = min(
+                timeit.repeat(lambda: dumps(document), number=number, repeat=repeat)
+            )
+            print(
+                f"  {codec_name:22} loads {decode / number * 1e6:10.1f} us"
+                f"  dumps {encode / number * 1e6:10.1f} us"
+            )
+
+
+if __name__ == "__main__":
+    main()
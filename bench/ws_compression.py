@@ -0,0 +1,163 @@
+"""Client-side cost of permessage-deflate on a stream of large block notifications.
+
+Usage:
+    python -m bench.ws_compression [blocks] [transactions_per_block]
+
+A local server process streams Solana-style blockNotification frames; the
+client connects through WebSocketMetric.connect with compression on and off
+and reads them through JsonRpcDemux. Reported per mode: wall time, client
+CPU time, peak traced memory, and bytes received on the socket.
+"""
+
+import asyncio
+import multiprocessing
+import sys
+import time
+import tracemalloc
+
+import websockets
+
+from common import json_codec
+from common.metric_config import MetricConfig, MetricLabels
+from common.ws_demux import JsonRpcDemux
+from metrics.solana import WsBlockLatencyMetric
+
+
+def build_block(slot: int, transactions: int) -> dict:
+    """A jsonParsed block shaped like a mainnet blockNotification."""
+    return {
+        "slot": slot,
+        "blockhash": f"{slot:064x}",
+        "previousBlockhash": f"{slot - 1:064x}",
+        "parentSlot": slot - 1,
+        "blockHeight": slot - 1000,
+        "blockTime": int(time.time()),
+        "transactions": [
+            {
+                "meta": {
+                    "err": None,
+                    "fee": 5000,
+                    "preBalances": [1_000_000 + i, 2_000_000, 1],
+                    "postBalances": [995_000 + i, 2_000_000, 1],
+                    "logMessages": [
+                        "Program ComputeBudget111111111111111111111111111111 invoke [1]",
+                        "Program ComputeBudget111111111111111111111111111111 success",
+                    ],
+                },
+                "transaction": {
+                    "signatures": [f"{slot:032x}{i:056x}"],
+                    "message": {
+                        "accountKeys": [
+                            {"pubkey": f"{i:044x}", "signer": True, "writable": True},
+                            {"pubkey": "Vote111111111111111111111111111111111111111"},
+                        ],
+                        "recentBlockhash": f"{slot - 2:064x}",
+                        "instructions": [
+                            {
+                                "programId": "Vote111111111111111111111111111111111111111",
+                                "parsed": {
+                                    "type": "vote",
+                                    "info": {"slots": [slot - 1]},
+                                },
+                            }
+                        ],
+                    },
+                },
+            }
+            for i in range(transactions)
+        ],
+    }
+
+
+def serve(port: int, blocks: int, transactions: int, ready) -> None:
+    frames = [
+        json_codec.dumps(
+            {
+                "jsonrpc": "2.0",
+                "method": "blockNotification",
+                "params": {
+                    "subscription": 1,
+                    "result": {
+                        "context": {"slot": slot},
+                        "value": {
+                            "slot": slot,
+                            "block": build_block(slot, transactions),
+                        },
+                    },
+                },
+            }
+        )
+        for slot in range(1_000_000, 1_000_000 + blocks)
+    ]
+
+    async def handler(websocket):
+        await websocket.recv()
+        await websocket.send(json_codec.dumps({"jsonrpc": "2.0", "id": 1, "result": 1}))
+        for frame in frames:
+            await websocket.send(frame)
+        await websocket.wait_closed()
+
+    async def main():
+        async with websockets.serve(handler, "127.0.0.1", port, max_size=None):
+            ready.set()
+            await asyncio.Future()
+
+    asyncio.run(main())
+
+
+async def measure(port: int, blocks: int, compression: bool) -> dict:
+    metric = WsBlockLatencyMetric(
+        metric_name="ws_block_latency",
+        labels=MetricLabels("bench", "bench", "Solana", "local"),
+        config=MetricConfig(
+            timeout=30, max_latency=60, ws_max_size=None, ws_compression=compression
+        ),
+        ws_endpoint=f"ws://127.0.0.1:{port}",
+    )
+    tracemalloc.start()
+    wall, cpu = time.perf_counter(), time.process_time()
+    websocket = await metric.connect()
+    connection = JsonRpcDemux(websocket, metric.config.ws_max_queue).start()
+    await connection.request(
+        metric.SUBSCRIBE_MESSAGES["full"], request_id=1, timeout=30
+    )
+    for _ in range(blocks):
+        await connection.next_notification(1)
+    fields = {
+        "wall_seconds": time.perf_counter() - wall,
+        "cpu_seconds": time.process_time() - cpu,
+        "peak_mib": tracemalloc.get_traced_memory()[1] / 2**20,
+    }
+    tracemalloc.stop()
+    fields["received_mib"] = websocket.pop_byte_counts()[0] / 2**20
+    await connection.close()
+    await websocket.close()
+    return fields
+
+
+def main() -> None:
+    blocks = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    transactions = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    port = 8799
+    ready = multiprocessing.Event()
+    server = multiprocessing.Process(
+        target=serve, args=(port, blocks, transactions, ready), daemon=True
+    )
+    server.start()
+    ready.wait()
+    try:
+        print(
+            f"{blocks} blocks x {transactions} transactions, json backend {json_codec.BACKEND}"
+        )
+        for compression in (False, True):
+            fields = asyncio.run(measure(port, blocks, compression))
+            print(
+                f"compression={str(compression).lower():5} "
+                + " ".join(f"{name}={value:.3f}" for name, value in fields.items())
+            )
+    finally:
+        server.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""Inter-arrival statistics for block notifications."""
+
+from typing import Dict, Optional, Union
+
+from common.ring_buffer import RingBuffer
+
+
+class ArrivalIntervals:
+    """
+    Time between consecutive block arrivals (monotonic seconds), kept in a
+    preallocated ring buffer so long windows do not allocate per block.
+    A node that stalls and then delivers a burst shows up as a large
+    `max_gap` followed by near-zero intervals, i.e. high jitter.
+    """
+
+    __slots__ = ("intervals", "last_arrival")
+
+    def __init__(self, capacity: int) -> None:
+        self.intervals = RingBuffer(capacity)
+        self.last_arrival: Optional[float] = None
+
+    def record(self, arrived_at: float) -> None:
+        """Record a block arrival; the first one only sets the reference point."""
+        if self.last_arrival is not None:
+            self.intervals.push(max(arrived_at - self.last_arrival, 0.0))
+        self.last_arrival = arrived_at
+
+    def pop_fields(self) -> Dict[str, Union[int, float]]:
+        """
+        Intervals recorded since the previous call as Influx fields: count,
+        mean, jitter (plain mean of the absolute differences between
+        consecutive intervals, not RFC 3550's smoothed estimator) and
+        max_gap. Empty when no interval was recorded.
+        """
+        values = self.intervals.drain()
+        if not values:
+            return {}
+        jitter = 0.0
+        for previous, current in zip(values, values[1:]):
+            jitter += abs(current - previous)
+        return {
+            "count": len(values),
+            "mean": sum(values) / len(values),
+            "jitter": jitter / (len(values) - 1) if len(values) > 1 else 0.0,
+            "max_gap": max(values),
+        }
@@ -1,22 +1,26 @@
 """Base class for metrics collection and processing."""
 
 import logging
+import time
 import uuid
 from abc import ABC, abstractmethod
-from typing import Any, List, Optional, Union
+from typing import TYPE_CHECKING, Any, Dict, Mapping, Optional, Union
 
+from common.influx import InfluxEncoder
 from common.metric_config import MetricConfig, MetricLabelKey, MetricLabels
 
+if TYPE_CHECKING:
+    from common.collection import MetricCollection
+
 
 class BaseMetric(ABC):
     """
     Abstract base class for metrics that manages collection and formatting.
     Suitable for a single-invocation environment like Vercel, where instances
-    are created, measured, and exported within one execution.
+    are created, measured, and exported within one execution. Instances are
+    owned by the MetricCollection of that execution, if any.
     """
 
-    _instances: List["BaseMetric"] = []
-
     def __init__(
         self,
         metric_name: str,
@@ -32,21 +36,10 @@ class BaseMetric(ABC):
         self.ws_endpoint = ws_endpoint
         self.http_endpoint = http_endpoint
         self.latest_value = None
-        self.__class__._instances.append(self)
-
-    @classmethod
-    def get_all_instances(cls) -> List["BaseMetric"]:
-        """Returns all instances of the metric classes (for this invocation)."""
-        return cls._instances
-
-    @classmethod
-    def get_all_latest_values(cls) -> List[str]:
-        """Returns all latest values in Influx line protocol."""
-        return [
-            instance.get_influx_format()
-            for instance in cls._instances
-            if instance.latest_value is not None
-        ]
+        self.timestamp_ns: Optional[int] = None
+        self.value_fields: Dict[str, Union[int, float]] = {}
+        self.extra_fields: Dict[str, Union[int, float]] = {}
+        self.collection: Optional["MetricCollection"] = None
 
     @abstractmethod
     async def collect_metric(self) -> None:
@@ -57,26 +50,120 @@ class BaseMetric(ABC):
         """Process data to extract the metric value, implemented in subclasses."""
 
     def get_influx_format(self) -> str:
-        """Formats the metric in Influx line protocol."""
+        """
+        Formats the metric in Influx line protocol.
+        Multi-sample metrics write their summary fields instead of `value`
+        (see `get_value_fields`); extra fields (e.g. HTTP phase timings) are
+        appended after them.
+        """
+        encoder = InfluxEncoder()
+        self.write_influx(encoder)
+        return encoder.getvalue()
+
+    def write_influx(self, encoder: InfluxEncoder) -> None:
+        """
+        Adds the metric as one multi-field point, stamped with the time its
+        value was recorded.
+        """
         if self.latest_value is None:
             raise ValueError("Metric value is not set")
 
-        tag_str = ",".join(
-            [f"{label.key.value}={label.value}" for label in self.labels.labels]
+        fields = self.get_value_fields()
+        encoder.add(
+            self.metric_name,
+            self.labels.get_influx_tags(),
+            {**fields, **self.extra_fields},
+            self.timestamp_ns,
         )
-        if tag_str:
-            return f"{self.metric_name},{tag_str} value={self.latest_value}"
 
-        return f"{self.metric_name} value={self.latest_value}"
+    def get_value_fields(self) -> Dict[str, Union[int, float]]:
+        """
+        Value fields to export: a pre-aggregated summary if one was set, else
+        the aggregate of this metric's samples in the collection's sample
+        store when it holds more than one, or any when sampling is configured
+        (so the field set does not depend on how many samples succeeded),
+        else the latest value.
+        """
+        if self.value_fields:
+            return self.value_fields
+        if self.collection is not None:
+            samples = self.collection.samples
+            count = samples.count(self.metric_id)
+            if count > 1 or (count and self.config.multi_sample):
+                return samples.aggregate(self.metric_id, self.config.sample_trim_iqr)
+        return {"value": self.latest_value}
+
+    def validate_latency(self, latency: Union[int, float]) -> None:
+        """Raises if a measured latency exceeds the configured maximum."""
+        if latency > self.config.max_latency:
+            raise ValueError(
+                f"Latency {latency}s exceeds maximum allowed {self.config.max_latency}s"
+            )
 
     async def update_metric_value(self, value: Union[int, float]) -> None:
-        """Updates the latest value of the metric."""
+        """
+        Records a sample: appends it to the collection's sample store and
+        makes it the latest value, stamped with the measurement time.
+        Calling this once per sample is how multi-sample metrics report.
+        """
+        if self.collection is not None:
+            self.collection.samples.append(self.metric_id, value)
+        self._set_latest_value(value)
+
+    async def update_metric_summary(
+        self, summary: Mapping[str, Union[int, float]]
+    ) -> None:
+        """
+        Stores summary fields aggregated elsewhere (see
+        `common.sample_store.summarize`); the median doubles as the latest value.
+        """
+        self.value_fields = dict(summary)
+        self._set_latest_value(summary["p50"])
+
+    def _set_latest_value(self, value: Union[int, float]) -> None:
         self.latest_value = value
+        self.timestamp_ns = time.time_ns()
         self.labels.update_label(MetricLabelKey.RESPONSE_STATUS, "success")
 
+    def spawn_series(
+        self,
+        labels: Dict[MetricLabelKey, str],
+        metric_name: Optional[str] = None,
+    ) -> "BaseMetric":
+        """
+        Create an additional series reported on behalf of this metric, with the
+        same labels plus `labels` overrides (e.g. connection_state=warm).
+        The series joins this metric's collection.
+        """
+        series_labels = self.labels.copy()
+        for key, value in labels.items():
+            series_labels.add_label(key, value)
+        series = SeriesMetric(
+            metric_name=metric_name or self.metric_name,
+            labels=series_labels,
+            config=self.config,
+            ws_endpoint=self.ws_endpoint,
+            http_endpoint=self.http_endpoint,
+        )
+        if self.collection is not None:
+            self.collection.add(series)
+        return series
+
     async def handle_error(self, error: Exception) -> None:
         """Handles errors by marking the metric as failed."""
         self.labels.update_label(MetricLabelKey.RESPONSE_STATUS, "failed")
         logging.error(
             "Error in %s: %s", self.labels.get_prometheus_labels(), str(error)
         )
+
+
+class SeriesMetric(BaseMetric):
+    """
+    Labelled series whose values are pushed by the metric that spawned it.
+    """
+
+    async def collect_metric(self) -> None:
+        """Values are set by the parent metric; nothing to collect."""
+
+    def process_data(self, data: Any) -> Union[int, float]:
+        return data
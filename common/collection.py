@@ -0,0 +1,49 @@
+"""Collection context that owns the metrics of one collection cycle."""
+
+from typing import List
+
+from common.base_metric import BaseMetric
+from common.influx import InfluxEncoder
+from common.sample_store import SampleStore
+
+
+class MetricCollection:
+    """
+    Holds the metric instances created during one collection cycle (one
+    serverless invocation), and the samples they record, and exports their
+    values. Series spawned by a metric join the collection of their parent.
+    Closing the collection drops every reference, so a warm instance does
+    not accumulate metrics or re-export values from earlier runs.
+    """
+
+    def __init__(self) -> None:
+        self.metrics: List[BaseMetric] = []
+        self.samples = SampleStore()
+
+    def __len__(self) -> int:
+        return len(self.metrics)
+
+    def __enter__(self) -> "MetricCollection":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def add(self, metric: BaseMetric) -> BaseMetric:
+        """Attach a metric to this cycle and return it."""
+        metric.collection = self
+        self.metrics.append(metric)
+        return metric
+
+    def write_influx(self, encoder: InfluxEncoder) -> None:
+        """Adds every metric of this cycle that has a value to `encoder`."""
+        for metric in self.metrics:
+            if metric.latest_value is not None:
+                metric.write_influx(encoder)
+
+    def close(self) -> None:
+        """Release the cycle's metrics."""
+        for metric in self.metrics:
+            metric.collection = None
+        self.metrics.clear()
+        self.samples.clear()
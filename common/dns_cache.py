@@ -0,0 +1,84 @@
+"""TTL cache for provider hostname resolution shared by HTTP and WebSocket metrics."""
+
+import asyncio
+import socket
+import time
+from typing import Dict, List, Tuple
+
+from aiohttp.abc import AbstractResolver
+
+Address = Tuple[int, str]
+
+
+class DnsCache:
+    """
+    Resolved addresses per hostname with a time-to-live.
+    MetricsHandler pre-resolves every provider host once per invocation; metrics
+    then read addresses from here instead of hitting the resolver again.
+    """
+
+    def __init__(self, ttl: float = 300.0) -> None:
+        self.ttl = ttl
+        self._entries: Dict[str, Tuple[float, List[Address]]] = {}
+
+    def get(self, host: str) -> List[Address]:
+        """Return cached (family, ip) pairs, or [] when missing or expired."""
+        entry = self._entries.get(host)
+        if entry is None:
+            return []
+        expires_at, addresses = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[host]
+            return []
+        return addresses
+
+    async def refresh(self, host: str) -> List[Address]:
+        """Resolve `host` through the system resolver and store the result."""
+        loop = asyncio.get_running_loop()
+        infos = await loop.getaddrinfo(host, None, type=socket.SOCK_STREAM)
+        addresses: List[Address] = []
+        for family, _, _, _, sockaddr in infos:
+            address = (int(family), sockaddr[0])
+            if address not in addresses:
+                addresses.append(address)
+        if not addresses:
+            raise OSError(f"No addresses resolved for {host}")
+        self._entries[host] = (time.monotonic() + self.ttl, addresses)
+        return addresses
+
+    async def resolve(self, host: str) -> List[Address]:
+        """Return cached addresses for `host`, resolving it on a miss."""
+        return self.get(host) or await self.refresh(host)
+
+
+class CachedResolver(AbstractResolver):
+    """aiohttp resolver backed by a DnsCache."""
+
+    def __init__(self, cache: DnsCache) -> None:
+        self.cache = cache
+
+    async def resolve(
+        self, host: str, port: int = 0, family: int = socket.AF_INET
+    ) -> List[Dict]:
+        addresses = await self.cache.resolve(host)
+        matching = [
+            address
+            for address in addresses
+            if family == socket.AF_UNSPEC or address[0] == family
+        ]
+        if not matching:
+            raise OSError(f"No address of family {family} resolved for {host}")
+        return [
+            {
+                "hostname": host,
+                "host": ip,
+                "port": port,
+                "family": address_family,
+                "proto": 0,
+                "flags": socket.AI_NUMERICHOST,
+            }
+            for address_family, ip in matching
+        ]
+
+    async def close(self) -> None:
+        """The cache outlives connectors, so there is nothing to release."""
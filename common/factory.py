@@ -1,11 +1,49 @@
 """Factory for creating metric instances based on blockchain and provider configuration."""
 
-from typing import Dict, List, Tuple, Type
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional, Tuple, Type
 
 from common.base_metric import BaseMetric
+from common.collection import MetricCollection
 from common.metric_config import MetricConfig, MetricLabels
 
 
+class PlannedMetric(NamedTuple):
+    """
+    One metric of a compiled collection plan: the class to instantiate, its
+    label values (source region, target region, blockchain, provider) and
+    read-only constructor parameters.
+    """
+
+    metric_class: Type[BaseMetric]
+    metric_name: str
+    labels: Tuple[str, str, str, str]
+    params: Mapping[str, Any]
+
+    def create(
+        self, collection: Optional[MetricCollection] = None, **kwargs
+    ) -> BaseMetric:
+        """
+        Instantiate the metric with fresh labels; `kwargs` adds per-invocation
+        parameters such as the HTTP session manager.
+        """
+        source_region, target_region, blockchain, provider = self.labels
+        metric = self.metric_class(
+            metric_name=self.metric_name,
+            labels=MetricLabels(
+                source_region=source_region,
+                target_region=target_region,
+                blockchain=blockchain,
+                provider=provider,
+            ),
+            **self.params,
+            **kwargs,
+        )
+        if collection is not None:
+            collection.add(metric)
+        return metric
+
+
 class MetricFactory:
     """
     Factory class to dynamically create metric instances based on blockchain name.
@@ -20,6 +58,7 @@ class MetricFactory:
     ):
         """
         Registers multiple metric classes for multiple blockchains.
+        Registering the same (metric_class, metric_name) again is a no-op.
 
         Args:
             blockchain_metrics (Dict[str, List[Tuple[Type[BaseMetric], str]]]):
@@ -32,8 +71,8 @@ class MetricFactory:
 
             for metric in metrics:
                 if isinstance(metric, tuple) and len(metric) == 2:
-                    metric_class, metric_name = metric
-                    cls._registry[blockchain_name].append((metric_class, metric_name))
+                    if metric not in cls._registry[blockchain_name]:
+                        cls._registry[blockchain_name].append(metric)
                 else:
                     raise ValueError(
                         "Each metric must be a tuple (metric_class, metric_name)"
@@ -44,6 +83,7 @@ class MetricFactory:
         cls,
         blockchain_name: str,
         config: MetricConfig,
+        collection: Optional[MetricCollection] = None,
         **kwargs,
     ) -> List[BaseMetric]:
         """
@@ -52,40 +92,46 @@ class MetricFactory:
         Args:
             blockchain_name (str): The name of the blockchain.
             config (MetricConfig): The configuration for the metrics.
+            collection (Optional[MetricCollection]): Collection cycle that owns the metrics.
             **kwargs: Additional parameters (e.g., source_region, target_region, provider)
 
         Returns:
             List[BaseMetric]: List of metric instances.
         """
+        return [
+            planned.create(collection)
+            for planned in cls.compile_plan(blockchain_name, config, **kwargs)
+        ]
+
+    @classmethod
+    def compile_plan(
+        cls,
+        blockchain_name: str,
+        config: MetricConfig,
+        **kwargs,
+    ) -> Tuple[PlannedMetric, ...]:
+        """
+        Resolve the registered metrics of a blockchain into an immutable plan
+        that can be instantiated on every invocation without repeating the
+        lookup. Takes the same arguments as `create_metrics`.
+        """
         if blockchain_name not in cls._registry:
             available = list(cls._registry.keys())
             raise ValueError(
                 f"No metric classes registered for blockchain '{blockchain_name}'. Available blockchains: {available}"
             )
 
-        source_region = kwargs.get("source_region", "default")
-        target_region = kwargs.get("target_region", "default")
-        provider = kwargs.get("provider", "default")
-
-        metrics = []
-        for metric_class, metric_name in cls._registry[blockchain_name]:
-            labels = MetricLabels(
-                source_region=source_region,
-                target_region=target_region,
-                blockchain=blockchain_name,
-                provider=provider,
-            )
-
-            metric_kwargs = kwargs.copy()
-            metric_instance = metric_class(
-                metric_name=metric_name,
-                labels=labels,
-                config=config,
-                **metric_kwargs,
-            )
-            metrics.append(metric_instance)
-
-        return metrics
+        labels = (
+            kwargs.get("source_region", "default"),
+            kwargs.get("target_region", "default"),
+            blockchain_name,
+            kwargs.get("provider", "default"),
+        )
+        params = MappingProxyType({**kwargs, "config": config})
+        return tuple(
+            PlannedMetric(metric_class, metric_name, labels, params)
+            for metric_class, metric_name in cls._registry[blockchain_name]
+        )
 
     @classmethod
     def get_metrics(cls, blockchain_name: str) -> List[Type[BaseMetric]]:
@@ -0,0 +1,83 @@
+"""Invocation-scoped pool of aiohttp sessions shared by HTTP metrics."""
+
+import asyncio
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from common import json_codec
+from common.dns_cache import CachedResolver, DnsCache
+from common.http_tracing import create_trace_config
+
+
+class HttpSessionManager:
+    """
+    Keeps one pooled connector per target host for the duration of an invocation.
+    MetricsHandler owns the manager and closes it once all metrics are collected;
+    metrics only borrow sessions from it and never close them.
+    """
+
+    def __init__(
+        self,
+        limit_per_host: int = 0,
+        keepalive_timeout: float = 30.0,
+        dns_cache: Optional[DnsCache] = None,
+    ) -> None:
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.resolver = CachedResolver(dns_cache) if dns_cache is not None else None
+        self._sessions: Dict[str, aiohttp.ClientSession] = {}
+
+    @staticmethod
+    def host_key(url: str) -> str:
+        """Returns the scheme://host:port key used to pool connections."""
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+    def get_session(self, url: str) -> aiohttp.ClientSession:
+        """
+        Return the pooled session for the host of `url`, creating it on first use.
+        Must be called from within the running event loop.
+        """
+        key = self.host_key(url)
+        session: Optional[aiohttp.ClientSession] = self._sessions.get(key)
+        if session is None or session.closed:
+            session = self.new_session(limit_per_host=self.limit_per_host)
+            self._sessions[key] = session
+        return session
+
+    def new_session(
+        self, limit: int = 100, limit_per_host: int = 0
+    ) -> aiohttp.ClientSession:
+        """
+        Create an unpooled session with the manager's resolver and tracing.
+        The caller owns it and must close it; `limit=1` pins all requests to a
+        single connection (used for cold vs warm sampling).
+        """
+        connector = aiohttp.TCPConnector(
+            limit=limit,
+            limit_per_host=limit_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+            resolver=self.resolver,
+        )
+        return aiohttp.ClientSession(
+            connector=connector,
+            json_serialize=json_codec.dumps,
+            trace_configs=[create_trace_config()],
+        )
+
+    async def close(self) -> None:
+        """Close every pooled session and its connector."""
+        sessions = list(self._sessions.values())
+        self._sessions.clear()
+        await asyncio.gather(
+            *(session.close() for session in sessions if not session.closed),
+            return_exceptions=True,
+        )
+
+    async def __aenter__(self) -> "HttpSessionManager":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
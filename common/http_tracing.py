@@ -0,0 +1,90 @@
+"""aiohttp tracing hooks that split HTTP request latency into phases."""
+
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, Optional
+
+import aiohttp
+
+
+class RequestTimings:
+    """
+    Monotonic timestamps captured for a single HTTP request.
+    Passed to aiohttp as `trace_request_ctx` and filled in by the trace hooks.
+    """
+
+    __slots__ = (
+        "request_start",
+        "dns_start",
+        "dns_end",
+        "connect_start",
+        "connect_end",
+        "headers_sent",
+        "response_start",
+        "body_end",
+    )
+
+    def __init__(self) -> None:
+        self.request_start: Optional[float] = None
+        self.dns_start: Optional[float] = None
+        self.dns_end: Optional[float] = None
+        self.connect_start: Optional[float] = None
+        self.connect_end: Optional[float] = None
+        self.headers_sent: Optional[float] = None
+        self.response_start: Optional[float] = None
+        self.body_end: Optional[float] = None
+
+    def mark_body_end(self) -> None:
+        """Record the moment the response body has been fully consumed."""
+        self.body_end = time.monotonic()
+
+    def phases(self) -> Dict[str, float]:
+        """
+        Returns per-phase durations in seconds.
+        aiohttp emits no separate TLS signal, so `connect_seconds` covers TCP
+        connect plus the TLS handshake; DNS time is excluded from it. Phases
+        that did not happen (e.g. a reused keep-alive connection) report 0.
+        """
+        dns = _span(self.dns_start, self.dns_end)
+        connect = max(_span(self.connect_start, self.connect_end) - dns, 0.0)
+        sent = self.headers_sent or self.connect_end or self.request_start
+        return {
+            "dns_seconds": dns,
+            "connect_seconds": connect,
+            "ttfb_seconds": _span(sent, self.response_start),
+            "download_seconds": _span(self.response_start, self.body_end),
+        }
+
+
+def _span(start: Optional[float], end: Optional[float]) -> float:
+    if start is None or end is None:
+        return 0.0
+    return end - start
+
+
+def _timings(trace_config_ctx: SimpleNamespace) -> Optional[RequestTimings]:
+    timings = trace_config_ctx.trace_request_ctx
+    return timings if isinstance(timings, RequestTimings) else None
+
+
+def _stamp(attribute: str):
+    async def hook(_session: Any, trace_config_ctx: SimpleNamespace, _params: Any):
+        timings = _timings(trace_config_ctx)
+        if timings is not None:
+            setattr(timings, attribute, time.monotonic())
+
+    return hook
+
+
+def create_trace_config() -> aiohttp.TraceConfig:
+    """Build a TraceConfig that records request phases into RequestTimings."""
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(_stamp("request_start"))
+    trace_config.on_dns_resolvehost_start.append(_stamp("dns_start"))
+    trace_config.on_dns_resolvehost_end.append(_stamp("dns_end"))
+    trace_config.on_connection_create_start.append(_stamp("connect_start"))
+    trace_config.on_connection_create_end.append(_stamp("connect_end"))
+    trace_config.on_request_headers_sent.append(_stamp("headers_sent"))
+    # on_request_end fires once the response status line and headers are read.
+    trace_config.on_request_end.append(_stamp("response_start"))
+    return trace_config
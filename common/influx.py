@@ -0,0 +1,107 @@
+"""Influx line protocol encoding for metric export."""
+
+import math
+from typing import Dict, List, Mapping, Optional, Union
+
+FieldValue = Union[bool, int, float, str]
+
+_MEASUREMENT_ESCAPES = str.maketrans({",": "\\,", " ": "\\ "})
+_KEY_ESCAPES = str.maketrans({",": "\\,", "=": "\\=", " ": "\\ "})
+_STRING_ESCAPES = str.maketrans({'"': '\\"', "\\": "\\\\"})
+
+
+def escape_measurement(name: str) -> str:
+    """Escape commas and spaces in a measurement name."""
+    return name.translate(_MEASUREMENT_ESCAPES)
+
+
+def escape_key(value: str) -> str:
+    """Escape commas, equals signs and spaces in tag keys, tag values and field keys."""
+    return value.translate(_KEY_ESCAPES)
+
+
+# Escaped "name=" prefixes of field keys and escaped measurement names; both
+# come from a small fixed set, so they are escaped once per process.
+_FIELD_PREFIXES: Dict[str, str] = {}
+_MEASUREMENTS: Dict[str, str] = {}
+
+
+def format_field_value(value: FieldValue, precision: int = 9) -> Optional[str]:
+    """
+    Format a field value; None for non-finite floats, which Influx rejects.
+    Floats use fixed precision with trailing zeros dropped. Integers are
+    written without the `i` suffix so that they share the float type of
+    fields that alternate between int and float values.
+    """
+    value_type = type(value)
+    if value_type is float:
+        if not math.isfinite(value):
+            return None
+        text = ("%.*f" % (precision, value)).rstrip("0")
+        return text[:-1] if text[-1] == "." else text
+    if value_type is bool:
+        return "true" if value else "false"
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        return format_field_value(float(value), precision)
+    return f'"{str(value).translate(_STRING_ESCAPES)}"'
+
+
+class InfluxEncoder:
+    """
+    Accumulates points into a single line protocol payload. Each point may
+    carry several fields and a nanosecond timestamp; tags are passed as an
+    already escaped tag set (see MetricLabels.get_influx_tags).
+    """
+
+    __slots__ = ("precision", "_parts", "_count")
+
+    def __init__(self, precision: int = 9) -> None:
+        self.precision = precision
+        self._parts: List[str] = []
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add(
+        self,
+        measurement: str,
+        tags: str,
+        fields: Mapping[str, FieldValue],
+        timestamp_ns: Optional[int] = None,
+    ) -> None:
+        """Append one point; points without a finite field value are skipped."""
+        precision = self.precision
+        field_parts = []
+        for key, value in fields.items():
+            text = format_field_value(value, precision)
+            if text is None:
+                continue
+            prefix = _FIELD_PREFIXES.get(key)
+            if prefix is None:
+                prefix = _FIELD_PREFIXES[key] = f"{escape_key(key)}="
+            field_parts.append(prefix + text)
+        if not field_parts:
+            return
+
+        name = _MEASUREMENTS.get(measurement)
+        if name is None:
+            name = _MEASUREMENTS[measurement] = escape_measurement(measurement)
+        parts = self._parts
+        if self._count:
+            parts.append("\n")
+        parts.append(name)
+        if tags:
+            parts.append(",")
+            parts.append(tags)
+        parts.append(" ")
+        parts.append(",".join(field_parts))
+        if timestamp_ns is not None:
+            parts.append(f" {timestamp_ns}")
+        self._count += 1
+
+    def getvalue(self) -> str:
+        """Return the encoded payload, one point per line."""
+        return "".join(self._parts)
@@ -0,0 +1,64 @@
+"""JSON codec used by all metrics; prefers orjson or msgspec when installed."""
+
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+
+    BACKEND = "orjson"
+
+    def loads(data: Union[str, bytes]) -> Any:
+        """Decode a JSON document."""
+        return orjson.loads(data)
+
+    def dumps_bytes(obj: Any) -> bytes:
+        """Encode an object as compact JSON bytes."""
+        return orjson.dumps(obj)
+
+except ImportError:
+    try:
+        import msgspec
+
+        BACKEND = "msgspec"
+        _decoder = msgspec.json.Decoder()
+        _encoder = msgspec.json.Encoder()
+
+        def loads(data: Union[str, bytes]) -> Any:
+            """Decode a JSON document."""
+            return _decoder.decode(data)
+
+        def dumps_bytes(obj: Any) -> bytes:
+            """Encode an object as compact JSON bytes."""
+            return _encoder.encode(obj)
+
+    except ImportError:
+        BACKEND = "json"
+
+        def loads(data: Union[str, bytes]) -> Any:
+            """Decode a JSON document."""
+            return json.loads(data)
+
+        def dumps_bytes(obj: Any) -> bytes:
+            """Encode an object as compact JSON bytes."""
+            return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+
+def dumps(obj: Any) -> str:
+    """Encode an object as a compact JSON string."""
+    return dumps_bytes(obj).decode("utf-8")
+
+
+def freeze(obj: Any) -> Any:
+    """
+    Return a hashable form of a JSON-compatible object, for use as a cache key.
+    Containers and scalars are tagged with their kind, so objects that would
+    serialize differently never compare equal (e.g. `True`, `1` and `1.0`, or
+    a dict and a list of pairs). Lists and tuples share a tag: both encode as
+    JSON arrays.
+    """
+    if isinstance(obj, dict):
+        return ("d", tuple((key, freeze(value)) for key, value in obj.items()))
+    if isinstance(obj, (list, tuple)):
+        return ("l", tuple(freeze(item) for item in obj))
+    return (type(obj), obj)
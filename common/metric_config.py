@@ -1,8 +1,11 @@
 """Configuration classes for metric collection settings."""
 
 import logging
+import sys
 from enum import Enum
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
+
+from common.influx import escape_key
 
 
 class MetricLabelKey(Enum):
@@ -15,6 +18,9 @@ class MetricLabelKey(Enum):
     - PROVIDER: RPC provider name
     - API_METHOD: Method being called
     - RESPONSE_STATUS: Response status from provider
+    - TARGET_HOST: Endpoint hostname (DNS resolution metrics only)
+    - CONNECTION_STATE: Cold (new connection) or warm (keep-alive) HTTP sample
+    - STAGE: WebSocket feed setup stage (connect, subscribe_ack, first_notification)
     """
 
     SOURCE_REGION = "source_region"
@@ -23,12 +29,32 @@ class MetricLabelKey(Enum):
     PROVIDER = "provider"
     API_METHOD = "api_method"
     RESPONSE_STATUS = "response_status"
+    TARGET_HOST = "target_host"
+    CONNECTION_STATE = "connection_state"
+    STAGE = "stage"
 
 
 class MetricConfig:
     """
     Configuration for the metric, including timeout, interval, etc.
     Suitable for serverless invocation—just holds configuration data.
+    `samples` > 1 enables multi-sample collection bounded by `sample_budget` seconds.
+    `sample_trim_iqr` > 0 drops samples outside Q1/Q3 -/+ k*IQR before aggregation.
+    With any multi-sample option set (`multi_sample`), series always export
+    summary fields, even when only one sample succeeded.
+    `skip_body` streams HTTP responses and only checks the JSON-RPC envelope.
+    `warm_samples` > 0 adds keep-alive samples after a cold one on the same connection.
+    `ws_window_seconds` / `ws_window_blocks` make WebSocket metrics read a window
+    of distinct blocks instead of a single notification.
+    `ws_probes` > 0 adds request/response and ping round-trip probes per WS connection.
+    `ws_mode` selects a chain-specific subscription variant (see the chain's
+    WebSocket metric); "full" keeps the default subscription.
+    `ws_max_size` / `ws_max_queue` bound incoming message size and buffered
+    messages (0 or None disables the limit); `ws_compression` toggles
+    permessage-deflate.
+    `ws_teardown_seconds` bounds unsubscribe and close after a WebSocket
+    measurement; `ws_teardown_background` runs that cleanup without blocking
+    the metric.
     """
 
     def __init__(
@@ -36,10 +62,48 @@ class MetricConfig:
         timeout: int,
         max_latency: int,
         extra_params: Optional[Dict[str, Any]] = None,
+        samples: int = 1,
+        sample_budget: Optional[float] = None,
+        skip_body: bool = False,
+        warm_samples: int = 0,
+        ws_window_seconds: float = 0.0,
+        ws_window_blocks: int = 0,
+        ws_probes: int = 0,
+        ws_mode: str = "full",
+        ws_max_size: Optional[int] = 2**20,
+        ws_max_queue: Optional[int] = 32,
+        ws_compression: bool = True,
+        ws_teardown_seconds: float = 2.0,
+        ws_teardown_background: bool = False,
+        sample_trim_iqr: float = 0.0,
     ) -> None:
         self.timeout = timeout
         self.max_latency = max_latency
         self.extra_params = extra_params or {}
+        self.samples = max(samples, 1)
+        self.sample_budget = sample_budget if sample_budget is not None else timeout
+        self.skip_body = skip_body
+        self.warm_samples = max(warm_samples, 0)
+        self.ws_window_seconds = max(ws_window_seconds, 0.0)
+        self.ws_window_blocks = max(ws_window_blocks, 0)
+        self.ws_probes = max(ws_probes, 0)
+        self.ws_mode = ws_mode
+        self.ws_max_size = ws_max_size or None
+        self.ws_max_queue = ws_max_queue or None
+        self.ws_compression = ws_compression
+        self.ws_teardown_seconds = ws_teardown_seconds
+        self.ws_teardown_background = ws_teardown_background
+        self.sample_trim_iqr = max(sample_trim_iqr, 0.0)
+
+    @property
+    def multi_sample(self) -> bool:
+        """Whether any sampling option takes more than one sample per series."""
+        return (
+            self.samples > 1
+            or self.warm_samples > 1
+            or self.ws_window_blocks > 1
+            or self.ws_window_seconds > 0
+        )
 
 
 class MetricLabel:
@@ -56,11 +120,26 @@ class MetricLabel:
         self.value = value
 
 
+# Fixed slot of each label key in MetricLabels; also the tag export order.
+_LABEL_SLOTS = {key: slot for slot, key in enumerate(MetricLabelKey)}
+
+# Marks label slots that were never set.
+_UNSET = object()
+
+
+def _intern(value: Any) -> Any:
+    return sys.intern(value) if isinstance(value, str) else value
+
+
 class MetricLabels:
     """
-    Holds a collection of MetricLabel instances for a metric.
+    Holds the labels of a metric in a fixed, key-indexed slot layout with
+    interned values. The escaped Influx tag string is cached and rebuilt only
+    after a label value changes.
     """
 
+    __slots__ = ("_values", "_tags")
+
     def __init__(
         self,
         source_region: str,
@@ -70,47 +149,90 @@ class MetricLabels:
         api_method: str = "default",
         response_status: str = "success",
     ) -> None:
-        self.labels = [
-            MetricLabel(MetricLabelKey.SOURCE_REGION, source_region),
-            MetricLabel(MetricLabelKey.TARGET_REGION, target_region),
-            MetricLabel(MetricLabelKey.BLOCKCHAIN, blockchain),
-            MetricLabel(MetricLabelKey.PROVIDER, provider),
-            MetricLabel(MetricLabelKey.API_METHOD, api_method),
-            MetricLabel(MetricLabelKey.RESPONSE_STATUS, response_status),
+        self._values: List[Any] = [_UNSET] * len(_LABEL_SLOTS)
+        self._values[:6] = map(
+            _intern,
+            (
+                source_region,
+                target_region,
+                blockchain,
+                provider,
+                api_method,
+                response_status,
+            ),
+        )
+        self._tags: Optional[str] = None
+
+    @property
+    def labels(self) -> List[MetricLabel]:
+        """
+        Returns the set labels as MetricLabel instances, in export order.
+        """
+        return [
+            MetricLabel(key, value)
+            for key, value in zip(MetricLabelKey, self._values)
+            if value is not _UNSET
         ]
 
+    def copy(self) -> "MetricLabels":
+        """
+        Returns an independent copy of the label collection.
+        """
+        labels = MetricLabels.__new__(MetricLabels)
+        labels._values = self._values.copy()
+        labels._tags = self._tags
+        return labels
+
+    def get_influx_tags(self) -> str:
+        """
+        Returns the escaped Influx tag set (key=value pairs joined by commas).
+        """
+        if self._tags is None:
+            self._tags = ",".join(
+                f"{key.value}={escape_key(str(value))}"
+                for key, value in zip(MetricLabelKey, self._values)
+                if value is not _UNSET
+            )
+        return self._tags
+
     def get_prometheus_labels(self) -> str:
         """
         Returns a string of Prometheus-style labels.
         """
-        return ",".join(f'{label.key.value}="{label.value}"' for label in self.labels)
+        return ",".join(
+            f'{key.value}="{value}"'
+            for key, value in zip(MetricLabelKey, self._values)
+            if value is not _UNSET
+        )
 
     def update_label(self, label_name: MetricLabelKey, new_value: str) -> None:
         """
         Update the value of a label.
         """
-        for label in self.labels:
-            if label.key == label_name:
-                label.value = new_value
-                return
-        logging.warning("Label '%s' not found!", label_name.value)
+        slot = _LABEL_SLOTS[label_name]
+        if self._values[slot] is _UNSET:
+            logging.warning("Label '%s' not found!", label_name.value)
+            return
+        self._set(slot, new_value)
 
     def add_label(self, label_name: MetricLabelKey, label_value: str) -> None:
         """
         Adds a new label to the collection.
         """
-        for label in self.labels:
-            if label.key == label_name:
-                self.update_label(label_name, label_value)
-                return
+        if not isinstance(label_name, MetricLabelKey):
+            raise ValueError(
+                f"Invalid key, must be an instance of MetricLabelKey Enum: {label_name}"
+            )
+        self._set(_LABEL_SLOTS[label_name], label_value)
 
-        self.labels.append(MetricLabel(label_name, label_value))
+    def _set(self, slot: int, value: str) -> None:
+        if self._values[slot] != value:
+            self._values[slot] = _intern(value)
+            self._tags = None
 
     def get_label(self, label_name: MetricLabelKey) -> Optional[str]:
         """
         Retrieve the value of a label by its key.
         """
-        for label in self.labels:
-            if label.key == label_name:
-                return label.value
-        return None
+        value = self._values[_LABEL_SLOTS[label_name]]
+        return None if value is _UNSET else value
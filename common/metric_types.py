@@ -1,24 +1,64 @@
-"""Base classes for different metric types - WebSocket and HTTP metrics with their 
+"""Base classes for different metric types - WebSocket and HTTP metrics with their
 core functionality."""
 
+import asyncio
 import logging
+import ssl
+import sys
 import time
 from abc import abstractmethod
-from typing import Any, Optional
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple, Union
+from urllib.parse import urlsplit
 
 import aiohttp
 import websockets
 
+from common import json_codec
+from common.arrivals import ArrivalIntervals
 from common.base_metric import BaseMetric
+from common.dns_cache import DnsCache
+from common.http_session import HttpSessionManager
+from common.http_tracing import RequestTimings
 from common.metric_config import MetricConfig, MetricLabelKey, MetricLabels
+from common.propagation import BlockPropagationIndex
+from common.rpc_envelope import stream_envelope
+from common.sample_store import FieldAverages
+from common.ws_demux import Frame, JsonRpcDemux
+from common.ws_transport import ByteCountingClientProtocol
+
+
+def _retrieve_result(task: asyncio.Task) -> None:
+    """Mark the outcome of an abandoned task as retrieved."""
+    if not task.cancelled():
+        task.exception()
 
 
 class WebSocketMetric(BaseMetric):
     """
     WebSocket-based metric for collecting data from a WebSocket connection.
     In a serverless environment, this will be called once per invocation.
+    Subclasses talk to the socket through a JsonRpcDemux, which routes
+    responses by request id and notifications by subscription id.
     """
 
+    # Number of recent block hashes remembered for deduplication.
+    SEEN_BLOCKS_LIMIT = 256
+
+    # Feed setup stages reported as ws_stage_latency_seconds.
+    STAGES = ("connect", "subscribe_ack", "first_notification")
+
+    # Teardowns running in the background (`config.ws_teardown_background`).
+    _teardown_tasks: "set[asyncio.Task]" = set()
+
+    # Inter-arrival intervals kept per sampling window; older ones are overwritten.
+    ARRIVAL_INTERVALS_LIMIT = 1024
+
+    # (method, serialized request, request id) sent as round-trip probes over
+    # the open socket when `config.ws_probes` is set.
+    ROUND_TRIP_PROBES: Tuple[Tuple[str, str, int], ...] = ()
+
     def __init__(
         self,
         metric_name: str,
@@ -26,63 +66,413 @@ class WebSocketMetric(BaseMetric):
         config: MetricConfig,
         ws_endpoint: Optional[str] = None,
         http_endpoint: Optional[str] = None,
+        dns_cache: Optional[DnsCache] = None,
+        propagation_index: Optional[BlockPropagationIndex] = None,
     ) -> None:
         super().__init__(metric_name, labels, config, ws_endpoint, http_endpoint)
+        self.dns_cache = dns_cache
+        self.propagation_index = propagation_index
+        self.propagation_lags = array("d")
         self.last_block_hash: Optional[str] = None
-        self.subscription_id: Optional[int] = None
+        self.seen_block_hashes: "OrderedDict[str, None]" = OrderedDict()
+        self.subscription_id: Optional[Union[int, str]] = None
         self.last_value_timestamp = None
+        self.last_frame: Optional[Frame] = None
+        self.stage_timings: Dict[str, float] = {}
+        self.subscribed_at: Optional[float] = None
+        self.frame_count = 0
+        self.frame_bytes = 0
+        self.frame_decode_seconds = 0.0
 
     @abstractmethod
-    async def subscribe(self, websocket: Any) -> None:
+    async def subscribe(self, connection: JsonRpcDemux) -> None:
         """Subscribes to WebSocket messages."""
 
     @abstractmethod
-    async def unsubscribe(self, websocket: Any) -> None:
+    async def unsubscribe(self, connection: JsonRpcDemux) -> None:
         """Unsubscribe from WebSocket subscription."""
 
     @abstractmethod
-    async def listen_for_data(self, websocket: Any) -> Optional[Any]:
+    async def listen_for_data(self, connection: JsonRpcDemux) -> Optional[Any]:
         """Listens for data on the WebSocket connection."""
 
+    def get_block_key(self, data: Any) -> Tuple[Optional[str], Optional[int]]:
+        """
+        Returns (block hash, height) of a block returned by `listen_for_data`,
+        used to match the same block across providers. Chains that cannot
+        identify blocks return (None, None) and skip propagation tracking.
+        """
+        return None, None
+
+    def get_propagation_lag(self, data: Any) -> Optional[float]:
+        """
+        Record the block's arrival in the propagation index and return how far
+        behind the fastest provider it arrived; None if it is not tracked.
+        """
+        if self.propagation_index is None or self.last_frame is None:
+            return None
+        block_hash, height = self.get_block_key(data)
+        if block_hash is None or height is None:
+            return None
+        return self.propagation_index.record(
+            block_hash, height, self.last_frame.received_at
+        )
+
+    def record_propagation(self, data: Any) -> None:
+        """Record how far behind the fastest provider this block arrived."""
+        lag = self.get_propagation_lag(data)
+        if lag is not None:
+            self.propagation_lags.append(lag)
+
+    async def report_propagation(self) -> None:
+        """Export recorded lags as a block_propagation_lag_seconds series."""
+        if not self.propagation_lags:
+            return
+        series = self.spawn_series({}, metric_name="block_propagation_lag_seconds")
+        for lag in self.propagation_lags:
+            await series.update_metric_value(lag)
+
+    async def report_arrival_intervals(
+        self, intervals: ArrivalIntervals, series: Optional[BaseMetric] = None
+    ) -> Optional[BaseMetric]:
+        """
+        Export block inter-arrival statistics (count, mean, jitter, max_gap)
+        as a block_interval_seconds series whose value is the longest gap.
+        Returns the updated series, or None if no interval was recorded.
+        """
+        fields = intervals.pop_fields()
+        if not fields:
+            return None
+        if series is None:
+            series = self.spawn_series({}, metric_name="block_interval_seconds")
+        series.value_fields = fields
+        await series.update_metric_value(fields["max_gap"])
+        return series
+
+    async def next_notification(self, connection: JsonRpcDemux) -> Frame:
+        """Wait for the next frame of this metric's subscription."""
+        frame = await connection.next_notification(self.subscription_id)
+        self.last_frame = frame
+        if self.subscribed_at is not None:
+            self.stage_timings["first_notification"] = max(
+                frame.received_at - self.subscribed_at, 0.0
+            )
+            self.subscribed_at = None
+        self.frame_count += 1
+        self.frame_bytes += frame.size
+        self.frame_decode_seconds += frame.decode_seconds
+        return frame
+
+    async def timed_subscribe(self, connection: JsonRpcDemux) -> None:
+        """Subscribe, recording the ack round trip as the subscribe_ack stage."""
+        start_time = time.monotonic()
+        await self.subscribe(connection)
+        self.subscribed_at = time.monotonic()
+        self.stage_timings["subscribe_ack"] = self.subscribed_at - start_time
+
+    def pop_stage_timings(self) -> Dict[str, float]:
+        """Return the stage timings of the current connection and reset them."""
+        timings = self.stage_timings
+        self.stage_timings = {}
+        return timings
+
+    async def report_stage_timings(self) -> None:
+        """
+        Export the connect, subscribe_ack and first_notification durations as
+        ws_stage_latency_seconds series labelled by stage.
+        """
+        for stage, seconds in self.pop_stage_timings().items():
+            series = self.spawn_series(
+                {MetricLabelKey.STAGE: stage}, metric_name="ws_stage_latency_seconds"
+            )
+            await series.update_metric_value(seconds)
+
+    def pop_frame_fields(self) -> Dict[str, Union[int, float]]:
+        """
+        Notification frames received since the last call, as Influx fields:
+        frame count, mean frame size in bytes and mean JSON decode time.
+        Duplicate notifications are included, since they cost the same.
+        """
+        if self.frame_count == 0:
+            return {}
+        fields = {
+            "frames": self.frame_count,
+            "frame_bytes": self.frame_bytes / self.frame_count,
+            "frame_decode_seconds": self.frame_decode_seconds / self.frame_count,
+        }
+        self.frame_count = 0
+        self.frame_bytes = 0
+        self.frame_decode_seconds = 0.0
+        return fields
+
+    def is_new_block(self, block_hash: Optional[str]) -> bool:
+        """
+        Returns True the first time a block hash is seen and remembers it.
+        Only the most recent SEEN_BLOCKS_LIMIT hashes are kept.
+        """
+        if not block_hash or block_hash in self.seen_block_hashes:
+            return False
+        self.seen_block_hashes[block_hash] = None
+        if len(self.seen_block_hashes) > self.SEEN_BLOCKS_LIMIT:
+            self.seen_block_hashes.popitem(last=False)
+        self.last_block_hash = block_hash
+        return True
+
+    def get_sampling_window(self) -> Tuple[int, float]:
+        """
+        Returns (max samples, duration in seconds) for multi-sample collection.
+        A configured block window takes precedence over `config.samples`.
+        """
+        config = self.config
+        if config.ws_window_blocks or config.ws_window_seconds:
+            return (
+                config.ws_window_blocks or sys.maxsize,
+                config.ws_window_seconds or config.sample_budget,
+            )
+        return config.samples, config.sample_budget
+
     async def connect(self) -> Any:
         """
         Establish WebSocket connection.
+        Connects to pre-resolved addresses when a DNS cache is available,
+        trying each in turn; TLS SNI, certificate verification and the Host
+        header still use the hostname from the endpoint URL.
+        Frame size, queue depth and compression come from the metric config.
+        The TCP/TLS/upgrade handshake, after name resolution, is recorded as
+        the connect stage.
         """
-        websocket = await websockets.connect(
-            self.ws_endpoint,
-            ping_timeout=self.config.timeout,
-            close_timeout=self.config.timeout,
-        )
+        connect_kwargs = {
+            "ping_timeout": self.config.timeout,
+            "close_timeout": self.config.timeout,
+            "max_size": self.config.ws_max_size,
+            "max_queue": self.config.ws_max_queue,
+            "compression": "deflate" if self.config.ws_compression else None,
+            "create_protocol": ByteCountingClientProtocol,
+        }
+        targets = [{}]
+        if self.dns_cache is not None:
+            parts = urlsplit(self.ws_endpoint)
+            addresses = await self.dns_cache.resolve(parts.hostname)
+            port = parts.port or (443 if parts.scheme == "wss" else 80)
+            if parts.scheme == "wss":
+                connect_kwargs["server_hostname"] = parts.hostname
+            targets = [{"host": ip, "port": port} for _, ip in addresses]
+
+        start_time = time.monotonic()
+        for attempt, target in enumerate(targets, start=1):
+            try:
+                websocket = await websockets.connect(
+                    self.ws_endpoint, **connect_kwargs, **target
+                )
+                break
+            except ssl.SSLError:
+                raise
+            except (OSError, asyncio.TimeoutError):
+                # Like create_connection, fall back to the next address.
+                if attempt == len(targets):
+                    raise
+        self.stage_timings = {"connect": time.monotonic() - start_time}
+        self.subscribed_at = None
         return websocket
 
     async def collect_metric(self) -> None:
         """
-        Collect a single websocket message once.
+        Collect a single websocket message once, or a window of distinct
+        messages over the same subscription (see `get_sampling_window`).
         """
         websocket = None
+        connection = None
+        probes = None
         try:
             websocket = await self.connect()
-            await self.subscribe(websocket)
+            connection = JsonRpcDemux(websocket, self.config.ws_max_queue).start()
+            await self.timed_subscribe(connection)
+            if self.config.ws_probes > 0:
+                probes = asyncio.create_task(self.run_probes(connection))
 
-            data = await self.listen_for_data(websocket)
-            if data is not None:
-                latency = self.process_data(data)
-                if latency > self.config.max_latency:
-                    raise ValueError(
-                        f"Latency {latency}s exceeds maximum allowed {self.config.max_latency}s"
-                    )
-                await self.update_metric_value(latency)
+            if self.get_sampling_window()[0] > 1:
+                await self.collect_samples(connection)
+            else:
+                data = await self.listen_for_data(connection)
+                if data is not None:
+                    self.record_propagation(data)
+                    latency = self.process_data(data)
+                    self.validate_latency(latency)
+                    await self.update_metric_value(latency)
+
+            self.extra_fields.update(self.pop_frame_fields())
+            await self.report_propagation()
+            if probes is not None:
+                await probes
 
         except Exception as e:
             await self.handle_error(e)
 
         finally:
+            if probes is not None and not probes.done():
+                probes.cancel()
+            await self.report_stage_timings()
             if websocket:
-                try:
-                    await self.unsubscribe(websocket)
-                    await websocket.close()
-                except Exception as e:
-                    logging.error("Error closing websocket: %s", str(e))
+                teardown = self.teardown(connection, websocket)
+                if self.config.ws_teardown_background:
+                    task = asyncio.create_task(teardown)
+                    WebSocketMetric._teardown_tasks.add(task)
+                    task.add_done_callback(WebSocketMetric._teardown_tasks.discard)
+                else:
+                    await teardown
+
+    async def teardown(self, connection: JsonRpcDemux, websocket: Any) -> None:
+        """
+        Unsubscribe and close the socket within `config.ws_teardown_seconds`;
+        a socket still open when the budget runs out is aborted. The duration
+        is reported as ws_teardown_seconds, marked failed if cleanup timed
+        out or raised.
+        """
+        series = self.spawn_series({}, metric_name="ws_teardown_seconds")
+        start_time = time.monotonic()
+        budget = self.config.ws_teardown_seconds
+        # The legacy close() swallows cancellation and keeps waiting for the
+        # closing handshake, so the task is not awaited past the budget: on
+        # timeout the transport is aborted, which lets the task finish.
+        websocket.close_timeout = budget
+        close_task = asyncio.ensure_future(self._close(connection, websocket))
+        close_task.add_done_callback(_retrieve_result)
+        done, _ = await asyncio.wait({close_task}, timeout=budget)
+
+        error: Optional[BaseException] = None
+        if close_task in done:
+            error = close_task.exception()
+        else:
+            error = TimeoutError(f"Teardown exceeded {budget}s budget")
+            close_task.cancel()
+        if error is not None and websocket.transport is not None:
+            websocket.transport.abort()
+
+        await series.update_metric_value(time.monotonic() - start_time)
+        if error is not None:
+            await series.handle_error(error)
+        self.extra_fields.update(self.pop_wire_fields(websocket))
+
+    async def _close(self, connection: JsonRpcDemux, websocket: Any) -> None:
+        try:
+            await self.unsubscribe(connection)
+        finally:
+            await connection.close()
+            await websocket.close()
+
+    @classmethod
+    async def wait_for_teardowns(cls) -> None:
+        """Wait for background teardowns; each is bounded by its own budget."""
+        if cls._teardown_tasks:
+            await asyncio.gather(*cls._teardown_tasks, return_exceptions=True)
+
+    def pop_wire_fields(
+        self, websocket: ByteCountingClientProtocol
+    ) -> Dict[str, Union[int, float]]:
+        """
+        Bytes exchanged on the socket since the last call, as Influx fields,
+        and whether permessage-deflate was negotiated.
+        """
+        received, sent = websocket.pop_byte_counts()
+        return {
+            "ws_bytes_received": received,
+            "ws_bytes_sent": sent,
+            "ws_compressed": int(websocket.compressed),
+        }
+
+    async def run_probes(self, connection: JsonRpcDemux) -> None:
+        """
+        Time JSON-RPC request/response round trips and protocol ping/pong over
+        the already-open socket, `config.ws_probes` samples each. Results go to
+        ws_response_latency_seconds and ws_ping_latency_seconds series.
+        """
+        for method, message, request_id in self.ROUND_TRIP_PROBES:
+            series = self.spawn_series(
+                {MetricLabelKey.API_METHOD: method},
+                metric_name="ws_response_latency_seconds",
+            )
+            await self._collect_probe(
+                series, lambda: self._timed_request(connection, message, request_id)
+            )
+
+        series = self.spawn_series(
+            {MetricLabelKey.API_METHOD: "ping"}, metric_name="ws_ping_latency_seconds"
+        )
+        await self._collect_probe(series, lambda: self._timed_ping(connection))
+
+    async def _collect_probe(self, series: BaseMetric, measure) -> None:
+        taken = 0
+        last_error: Optional[Exception] = None
+        for _ in range(self.config.ws_probes):
+            try:
+                latency = await measure()
+                series.validate_latency(latency)
+                await series.update_metric_value(latency)
+                taken += 1
+            except Exception as e:
+                last_error = e
+
+        if taken == 0:
+            await series.handle_error(last_error)
+
+    async def _timed_request(
+        self, connection: JsonRpcDemux, message: str, request_id: int
+    ) -> float:
+        """Round trip from send to the response frame's arrival."""
+        start_time = time.monotonic()
+        frame = await connection.request(message, request_id, self.config.timeout)
+        if frame.message.get("error") is not None:
+            raise ValueError(f"JSON-RPC error: {frame.message['error']}")
+        return frame.received_at - start_time
+
+    async def _timed_ping(self, connection: JsonRpcDemux) -> float:
+        """Round trip of a WebSocket protocol ping/pong."""
+        start_time = time.monotonic()
+        pong_waiter = await connection.websocket.ping()
+        await asyncio.wait_for(pong_waiter, self.config.timeout)
+        return time.monotonic() - start_time
+
+    async def collect_samples(self, connection: JsonRpcDemux) -> None:
+        """
+        Read notifications until the window's block count or duration is reached.
+        Duplicates are skipped; blocks over the latency limit are logged and
+        dropped. The exported `count` is the number of distinct blocks used.
+        Arrival times of distinct blocks feed the inter-arrival statistics.
+        """
+        max_samples, duration = self.get_sampling_window()
+        taken = 0
+        intervals = ArrivalIntervals(min(max_samples, self.ARRIVAL_INTERVALS_LIMIT))
+        deadline = time.monotonic() + duration
+        last_error: Optional[Exception] = None
+        while taken < max_samples:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                data = await asyncio.wait_for(
+                    self.listen_for_data(connection), remaining
+                )
+            except asyncio.TimeoutError:
+                break
+            if data is None:
+                continue
+            intervals.record(self.last_frame.received_at)
+            self.record_propagation(data)
+            try:
+                latency = self.process_data(data)
+                self.validate_latency(latency)
+            except ValueError as e:
+                logging.warning("Skipping block sample: %s", str(e))
+                last_error = e
+                continue
+            await self.update_metric_value(latency)
+            taken += 1
+
+        await self.report_arrival_intervals(intervals)
+        if taken == 0:
+            raise last_error or ValueError(
+                "No block notifications received within sampling window"
+            )
 
 
 class HttpMetric(BaseMetric):
@@ -97,20 +487,54 @@ class HttpMetric(BaseMetric):
 
     async def collect_metric(self) -> None:
         """
-        Collect an HTTP metric once.
+        Collect an HTTP metric once, or `config.samples` times sequentially.
         """
+        if self.config.samples > 1:
+            await self.collect_samples()
+            return
+
         try:
             data = await self.fetch_data()
             if data is not None:
                 latency = self.process_data(data)
-                if latency > self.config.max_latency:
-                    raise ValueError(
-                        f"Latency {latency}s exceeds maximum allowed {self.config.max_latency}s"
-                    )
+                self.validate_latency(latency)
                 await self.update_metric_value(latency)
         except Exception as e:
             await self.handle_error(e)
 
+    async def collect_samples(self) -> None:
+        """
+        Take up to `config.samples` samples within `config.sample_budget` seconds.
+        Failed samples are skipped; the metric fails only if none succeeded.
+        Extra fields (e.g. HTTP phase timings) are averaged over the
+        successful samples.
+        """
+        taken = 0
+        deadline = time.monotonic() + self.config.sample_budget
+        last_error: Optional[Exception] = None
+        sample_fields = FieldAverages()
+        for _ in range(self.config.samples):
+            if time.monotonic() >= deadline:
+                break
+            self.extra_fields = {}
+            try:
+                data = await self.fetch_data()
+                if data is None:
+                    continue
+                latency = self.process_data(data)
+                self.validate_latency(latency)
+                await self.update_metric_value(latency)
+                sample_fields.add(self.extra_fields)
+                taken += 1
+            except Exception as e:
+                last_error = e
+        self.extra_fields = sample_fields.averages()
+
+        if taken == 0:
+            await self.handle_error(
+                last_error or ValueError("No samples taken within sample budget")
+            )
+
 
 class HttpCallLatencyMetricBase(HttpMetric):
     """
@@ -118,6 +542,12 @@ class HttpCallLatencyMetricBase(HttpMetric):
     Subclasses specify JSON-RPC method and parameters.
     """
 
+    # Whether the response may be validated by an envelope scan instead of a decode.
+    supports_skip_body = True
+
+    # Serialized request bodies shared by all instances, keyed by class and payload.
+    _request_body_cache: Dict[Any, bytes] = {}
+
     def __init__(
         self,
         metric_name: str,
@@ -134,6 +564,9 @@ class HttpCallLatencyMetricBase(HttpMetric):
             config=config,
             http_endpoint=http_endpoint,
         )
+        self.session_manager: Optional[HttpSessionManager] = kwargs.get(
+            "session_manager"
+        )
         self.method = method
         self.method_params = method_params or None
         self.labels.update_label(MetricLabelKey.API_METHOD, method)
@@ -144,29 +577,163 @@ class HttpCallLatencyMetricBase(HttpMetric):
         }
         if self.method_params:
             self._base_request["params"] = self.method_params
+        self._request_body = self.compile_request(self._base_request)
+
+    @classmethod
+    def compile_request(cls, payload: Any) -> bytes:
+        """
+        Serialize a JSON-RPC payload once per class and parameter set.
+        The immutable bytes are sent as-is, keeping encoding out of the timed window.
+        """
+        key = (cls, json_codec.freeze(payload))
+        body = cls._request_body_cache.get(key)
+        if body is None:
+            body = json_codec.dumps_bytes(payload)
+            cls._request_body_cache[key] = body
+        return body
+
+    async def collect_metric(self) -> None:
+        """
+        Collect the metric, splitting it into cold and warm connection series
+        when `config.warm_samples` is set.
+        """
+        if self.config.warm_samples > 0:
+            await self.collect_cold_warm()
+            return
+        await super().collect_metric()
+
+    async def collect_cold_warm(self) -> None:
+        """
+        Take one sample on a fresh connection (connection_state=cold), then
+        `config.warm_samples` samples reusing that keep-alive connection
+        (connection_state=warm).
+        """
+        self.labels.add_label(MetricLabelKey.CONNECTION_STATE, "cold")
+        warm = self.spawn_series({MetricLabelKey.CONNECTION_STATE: "warm"})
+        manager = self.session_manager or HttpSessionManager()
+        async with manager.new_session(limit=1) as session:
+            try:
+                latency = self.process_data(await self._timed_post(session))
+                self.validate_latency(latency)
+                await self.update_metric_value(latency)
+            except Exception as e:
+                await self.handle_error(e)
+
+            taken = 0
+            last_error: Optional[Exception] = None
+            sample_fields = FieldAverages()
+            for _ in range(self.config.warm_samples):
+                try:
+                    fields: Dict[str, Union[int, float]] = {}
+                    latency = self.process_data(await self._timed_post(session, fields))
+                    self.validate_latency(latency)
+                    await warm.update_metric_value(latency)
+                    sample_fields.add(fields)
+                    taken += 1
+                except Exception as e:
+                    last_error = e
+            warm.extra_fields = sample_fields.averages()
+
+        if taken == 0:
+            await warm.handle_error(last_error)
 
     async def fetch_data(self) -> float:
         """
         Perform the HTTP request once and return the response time.
+        Uses the invocation-wide pooled session when one is available.
         """
-        start_time = time.monotonic()
+        if self.session_manager is not None:
+            session = self.session_manager.get_session(self.http_endpoint)
+            return await self._timed_post(session)
 
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                self.http_endpoint,
-                headers={
-                    "Accept": "application/json",
-                    "Content-Type": "application/json",
-                },
-                json=self._base_request,
-                timeout=self.config.timeout,
-            ) as response:
-                if response.status == 200:
-                    await response.json()
-                    latency = time.monotonic() - start_time
-                    return latency
+        async with HttpSessionManager() as manager:
+            return await self._timed_post(manager.get_session(self.http_endpoint))
 
+    async def _timed_post(
+        self,
+        session: aiohttp.ClientSession,
+        fields: Optional[Dict[str, Union[int, float]]] = None,
+    ) -> float:
+        """
+        Send the JSON-RPC request on `session` and time it.
+        Per-phase timings are written to `fields`, the metric's extra fields
+        by default.
+        """
+        if fields is None:
+            fields = self.extra_fields
+        timings = RequestTimings()
+        start_time = time.monotonic()
+        async with session.post(
+            self.http_endpoint,
+            headers={
+                "Accept": "application/json",
+                "Content-Type": "application/json",
+            },
+            data=self._request_body,
+            timeout=self.config.timeout,
+            trace_request_ctx=timings,
+        ) as response:
+            if response.status != 200:
                 raise ValueError(f"Unexpected status code: {response.status}.")
 
+            if self.config.skip_body and self.supports_skip_body:
+                body_bytes, outcome = await stream_envelope(response.content)
+                timings.mark_body_end()
+                latency = time.monotonic() - start_time
+                if outcome != "result":
+                    raise ValueError(f"JSON-RPC envelope check failed: {outcome}")
+                fields["body_bytes"] = body_bytes
+            else:
+                data = await response.json(loads=json_codec.loads)
+                timings.mark_body_end()
+                latency = time.monotonic() - start_time
+                self.validate_response(data)
+
+            fields.update(timings.phases())
+            return latency
+
+    def validate_response(self, data: Any) -> None:
+        """Raise if the JSON-RPC response carries an error instead of a result."""
+        if isinstance(data, dict) and data.get("error") is not None:
+            raise ValueError(f"JSON-RPC error: {data['error']}")
+
+    def process_data(self, value: float) -> float:
+        return value
+
+
+class DnsResolutionLatencyMetric(BaseMetric):
+    """
+    Times hostname resolution for a provider endpoint host.
+    Run once per unique host before the RPC metrics so that they reuse the
+    cached addresses and resolver latency stays out of their numbers.
+    """
+
+    def __init__(
+        self,
+        metric_name: str,
+        labels: MetricLabels,
+        config: MetricConfig,
+        host: str,
+        dns_cache: DnsCache,
+    ) -> None:
+        super().__init__(metric_name=metric_name, labels=labels, config=config)
+        self.host = host
+        self.dns_cache = dns_cache
+        self.labels.update_label(MetricLabelKey.API_METHOD, "dns_resolve")
+        self.labels.add_label(MetricLabelKey.TARGET_HOST, host)
+
+    async def collect_metric(self) -> None:
+        """Resolve the host once, storing the result in the shared cache."""
+        try:
+            start_time = time.monotonic()
+            await asyncio.wait_for(
+                self.dns_cache.refresh(self.host), self.config.timeout
+            )
+            latency = self.process_data(time.monotonic() - start_time)
+            self.validate_latency(latency)
+            await self.update_metric_value(latency)
+        except Exception as e:
+            await self.handle_error(e)
+
     def process_data(self, value: float) -> float:
         return value
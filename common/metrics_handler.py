@@ -1,26 +1,53 @@
 """Handlers for collecting and pushing metrics in a serverless environment."""
 
 import asyncio
-import json
 import logging
 import os
 from http.server import BaseHTTPRequestHandler
-from typing import List, Tuple, Type
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple, Type
+from urllib.parse import urlsplit
 
 import aiohttp
 
-from common.base_metric import BaseMetric
-from common.factory import MetricFactory
-from common.metric_config import MetricConfig
+from common import json_codec
+from common.collection import MetricCollection
+from common.dns_cache import DnsCache
+from common.factory import MetricFactory, PlannedMetric
+from common.http_session import HttpSessionManager
+from common.influx import InfluxEncoder
+from common.metric_config import MetricConfig, MetricLabels
+from common.metric_types import DnsResolutionLatencyMetric, WebSocketMetric
+from common.propagation import BlockPropagationIndex
+
+
+class CollectionPlan(NamedTuple):
+    """
+    Immutable per-process plan: the chain's providers from ENDPOINTS and the
+    planned metrics of each, compiled once and executed on every invocation.
+    """
+
+    endpoints: str
+    region: str
+    providers: Tuple[dict, ...]
+    metrics: Tuple[Tuple[PlannedMetric, ...], ...]
 
 
 class MetricsHandler:
     """Handles collection and pushing of metrics for a specific blockchain."""
 
-    def __init__(self, blockchain: str, metrics: List[Tuple[Type, str]]):
-        """Initialize handler with blockchain and metrics configuration."""
+    def __init__(
+        self,
+        blockchain: str,
+        metrics: List[Tuple[Type, str]],
+        batch_metrics: Optional[List[Tuple[Type, str]]] = None,
+    ):
+        """
+        Initialize handler with blockchain and metrics configuration.
+        `batch_metrics` replaces `metrics` when BATCH_MODE is enabled.
+        """
         self.blockchain = blockchain
         self.metrics = metrics
+        self.batch_metrics = batch_metrics
         self.grafana_config = {
             "current_region": os.getenv("VERCEL_REGION"),
             "url": os.environ.get("GRAFANA_URL"),
@@ -31,24 +58,168 @@ class MetricsHandler:
             "push_timeout": int(os.environ.get("PUSH_TIMEOUT", "10")),
             "metric_request_timeout": int(os.environ.get("REQUEST_TIMEOUT", "30")),
             "metric_max_latency": int(os.environ.get("MAX_LATENCY", "30")),
+            "batch_mode": os.environ.get("BATCH_MODE", "false").lower() == "true",
+            "metric_samples": int(os.environ.get("SAMPLES_PER_METRIC", "1")),
+            "metric_sample_budget": float(os.environ.get("SAMPLE_BUDGET", "30")),
+            "metric_sample_trim_iqr": float(os.environ.get("SAMPLE_TRIM_IQR", "0")),
+            "metric_skip_body": os.environ.get("HTTP_SKIP_BODY", "false").lower()
+            == "true",
+            "dns_cache_ttl": float(os.environ.get("DNS_CACHE_TTL", "300")),
+            "metric_warm_samples": int(os.environ.get("WARM_SAMPLES", "0")),
+            "ws_window_seconds": float(os.environ.get("WS_WINDOW_SECONDS", "0")),
+            "ws_window_blocks": int(os.environ.get("WS_WINDOW_BLOCKS", "0")),
+            "ws_probes": int(os.environ.get("WS_PROBE_SAMPLES", "0")),
+            "ws_mode": os.environ.get("WS_SUBSCRIPTION_MODE", "full").lower(),
+            "ws_max_size": int(os.environ.get("WS_MAX_SIZE", str(2**20))),
+            "ws_max_queue": int(os.environ.get("WS_MAX_QUEUE", "32")),
+            "ws_compression": os.environ.get("WS_COMPRESSION", "true").lower()
+            == "true",
+            "ws_teardown_seconds": float(os.environ.get("WS_TEARDOWN_TIMEOUT", "2")),
+            "ws_teardown_background": os.environ.get(
+                "WS_TEARDOWN_BACKGROUND", "false"
+            ).lower()
+            == "true",
         }
+        self.dns_cache = DnsCache(ttl=self.grafana_config["dns_cache_ttl"])
+        self.plan: Optional[CollectionPlan] = None
 
-    async def collect_metrics(self, provider: dict, config: dict):
-        """Collect metrics for a specific provider."""
-        try:
-            metrics = MetricFactory.create_metrics(
-                blockchain_name=self.blockchain,
-                config=MetricConfig(
-                    timeout=self.grafana_config["metric_request_timeout"],
-                    max_latency=self.grafana_config["metric_max_latency"],
+    def get_metric_config(self, provider: Optional[dict] = None) -> MetricConfig:
+        """
+        Build the metric configuration for an invocation. A provider's
+        `websocket_options` (max_size, max_queue, compression) override the
+        environment's WebSocket transport settings.
+        """
+        ws_options = (provider or {}).get("websocket_options") or {}
+        return MetricConfig(
+            timeout=self.grafana_config["metric_request_timeout"],
+            max_latency=self.grafana_config["metric_max_latency"],
+            samples=self.grafana_config["metric_samples"],
+            sample_budget=self.grafana_config["metric_sample_budget"],
+            skip_body=self.grafana_config["metric_skip_body"],
+            warm_samples=self.grafana_config["metric_warm_samples"],
+            ws_window_seconds=self.grafana_config["ws_window_seconds"],
+            ws_window_blocks=self.grafana_config["ws_window_blocks"],
+            ws_probes=self.grafana_config["ws_probes"],
+            ws_mode=self.grafana_config["ws_mode"],
+            ws_max_size=ws_options.get("max_size", self.grafana_config["ws_max_size"]),
+            ws_max_queue=ws_options.get(
+                "max_queue", self.grafana_config["ws_max_queue"]
+            ),
+            ws_compression=ws_options.get(
+                "compression", self.grafana_config["ws_compression"]
+            ),
+            ws_teardown_seconds=self.grafana_config["ws_teardown_seconds"],
+            ws_teardown_background=self.grafana_config["ws_teardown_background"],
+            sample_trim_iqr=self.grafana_config["metric_sample_trim_iqr"],
+        )
+
+    def get_collection_plan(self, endpoints: str) -> CollectionPlan:
+        """
+        Return the collection plan for an ENDPOINTS value, compiling it on
+        first use. Registration happens only then, so a warm instance does
+        the same per-invocation work as a cold one. A provider whose plan
+        cannot be compiled is logged and left out.
+        """
+        if self.plan is not None and self.plan.endpoints == endpoints:
+            return self.plan
+
+        config = json_codec.loads(endpoints)
+        MetricFactory.register({self.blockchain: self.get_active_metrics()})
+        region = config.get("region", "default")
+        providers = []
+        metrics = []
+        for provider in config.get("providers", []):
+            if provider["blockchain"] != self.blockchain:
+                continue
+            try:
+                planned_metrics = MetricFactory.compile_plan(
+                    blockchain_name=self.blockchain,
+                    config=self.get_metric_config(provider),
+                    provider=provider["name"],
+                    source_region=self.grafana_config["current_region"],
+                    target_region=region,
+                    ws_endpoint=provider.get("websocket_endpoint"),
+                    http_endpoint=provider.get("http_endpoint"),
+                    extra_params={"tx_data": provider.get("data")},
+                    dns_cache=self.dns_cache,
+                )
+            except Exception as e:
+                logging.error(
+                    "Skipping %s provider %s: %s",
+                    self.blockchain,
+                    provider.get("name"),
+                    e,
+                )
+                continue
+            providers.append(provider)
+            metrics.append(planned_metrics)
+
+        self.plan = CollectionPlan(
+            endpoints=endpoints,
+            region=region,
+            providers=tuple(providers),
+            metrics=tuple(metrics),
+        )
+        return self.plan
+
+    async def resolve_hosts(
+        self,
+        providers: Sequence[dict],
+        region: str,
+        collection: Optional[MetricCollection] = None,
+    ):
+        """
+        Resolve each unique provider endpoint host once and cache the addresses.
+        Resolution time is reported per host as its own metric.
+        """
+        hosts: Dict[str, str] = {}
+        for provider in providers:
+            for endpoint in (
+                provider.get("http_endpoint"),
+                provider.get("websocket_endpoint"),
+            ):
+                host = urlsplit(endpoint).hostname if endpoint else None
+                if host and host not in hosts:
+                    hosts[host] = provider["name"]
+
+        metrics = [
+            DnsResolutionLatencyMetric(
+                metric_name="dns_resolution_seconds",
+                labels=MetricLabels(
+                    source_region=self.grafana_config["current_region"],
+                    target_region=region,
+                    blockchain=self.blockchain,
+                    provider=provider_name,
                 ),
-                provider=provider["name"],
-                source_region=self.grafana_config["current_region"],
-                target_region=config.get("region", "default"),
-                ws_endpoint=provider.get("websocket_endpoint"),
-                http_endpoint=provider.get("http_endpoint"),
-                extra_params={"tx_data": provider.get("data")},
+                config=self.get_metric_config(),
+                host=host,
+                dns_cache=self.dns_cache,
             )
+            for host, provider_name in hosts.items()
+        ]
+        if collection is not None:
+            for metric in metrics:
+                collection.add(metric)
+        await asyncio.gather(*(m.collect_metric() for m in metrics))
+
+    async def collect_metrics(
+        self,
+        provider: dict,
+        planned_metrics: Sequence[PlannedMetric],
+        session_manager: Optional[HttpSessionManager] = None,
+        propagation_index: Optional[BlockPropagationIndex] = None,
+        collection: Optional[MetricCollection] = None,
+    ):
+        """Collect the planned metrics of a specific provider."""
+        try:
+            metrics = [
+                planned.create(
+                    collection,
+                    session_manager=session_manager,
+                    propagation_index=propagation_index,
+                )
+                for planned in planned_metrics
+            ]
             await asyncio.gather(*(m.collect_metric() for m in metrics))
         except Exception as e:
             logging.error(
@@ -58,9 +229,17 @@ class MetricsHandler:
                 e,
             )
 
-    def get_metrics_text(self) -> str:
-        """Get formatted metrics text for Grafana."""
-        return "\n".join(BaseMetric.get_all_latest_values())
+    def get_active_metrics(self) -> List[Tuple[Type, str]]:
+        """Return the batch metric set when batch mode is enabled and available."""
+        if self.grafana_config["batch_mode"] and self.batch_metrics:
+            return self.batch_metrics
+        return self.metrics
+
+    def get_metrics_text(self, collection: MetricCollection) -> str:
+        """Get formatted metrics text of a collection cycle for Grafana."""
+        encoder = InfluxEncoder()
+        collection.write_influx(encoder)
+        return encoder.getvalue()
 
     async def push_to_grafana(self, metrics_text: str):
         """Push collected metrics to Grafana."""
@@ -94,22 +273,32 @@ class MetricsHandler:
     async def handle(self) -> Tuple[str, str]:
         """Main handler for metric collection and pushing."""
         try:
-            config = json.loads(os.getenv("ENDPOINTS"))
-            MetricFactory.register({self.blockchain: self.metrics})
+            plan = self.get_collection_plan(os.getenv("ENDPOINTS"))
 
-            chain_providers = [
-                p
-                for p in config.get("providers", [])
-                if p["blockchain"] == self.blockchain
-            ]
-            await asyncio.gather(
-                *(
-                    self.collect_metrics(provider, config)
-                    for provider in chain_providers
-                )
-            )
+            with MetricCollection() as collection:
+                await self.resolve_hosts(plan.providers, plan.region, collection)
+                propagation_index = BlockPropagationIndex()
+                async with HttpSessionManager(
+                    dns_cache=self.dns_cache
+                ) as session_manager:
+                    await asyncio.gather(
+                        *(
+                            self.collect_metrics(
+                                provider,
+                                planned_metrics,
+                                session_manager,
+                                propagation_index,
+                                collection,
+                            )
+                            for provider, planned_metrics in zip(
+                                plan.providers, plan.metrics
+                            )
+                        )
+                    )
+                    await WebSocketMetric.wait_for_teardowns()
+
+                metrics_text = self.get_metrics_text(collection)
 
-            metrics_text = self.get_metrics_text()
             if metrics_text:
                 await self.push_to_grafana(metrics_text)
 
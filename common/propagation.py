@@ -0,0 +1,47 @@
+"""Cross-provider block propagation tracking within one collector process."""
+
+from typing import Dict, List, Optional
+
+
+class BlockPropagationIndex:
+    """
+    First-seen arrival time per block hash, shared by all providers of a chain.
+    Each provider's arrival is compared with the earliest arrival of the same
+    block, which gives sub-second propagation lag without relying on the
+    whole-second block timestamp.
+
+    Memory is bounded by keeping only the `max_heights` most recent heights;
+    blocks at or below an evicted height are ignored.
+    """
+
+    def __init__(self, max_heights: int = 64) -> None:
+        self.max_heights = max_heights
+        self._first_seen: Dict[str, float] = {}
+        self._hashes_by_height: Dict[int, List[str]] = {}
+        self._evicted_height = -1
+
+    def __len__(self) -> int:
+        return len(self._first_seen)
+
+    def record(
+        self, block_hash: str, height: int, arrived_at: float
+    ) -> Optional[float]:
+        """
+        Record a provider's arrival of a block (monotonic seconds) and return
+        its lag behind the fastest provider, or None for evicted heights.
+        """
+        if height <= self._evicted_height:
+            return None
+
+        first_seen = self._first_seen.get(block_hash)
+        if first_seen is not None:
+            return max(arrived_at - first_seen, 0.0)
+
+        self._first_seen[block_hash] = arrived_at
+        self._hashes_by_height.setdefault(height, []).append(block_hash)
+        while len(self._hashes_by_height) > self.max_heights:
+            lowest = min(self._hashes_by_height)
+            for evicted_hash in self._hashes_by_height.pop(lowest):
+                self._first_seen.pop(evicted_hash, None)
+            self._evicted_height = max(self._evicted_height, lowest)
+        return 0.0
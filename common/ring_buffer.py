@@ -0,0 +1,48 @@
+"""Fixed-size float ring buffer for long-running collectors."""
+
+from array import array
+
+
+class RingBuffer:
+    """
+    Preallocated circular buffer of floats. Pushing never allocates; once full,
+    the oldest values are overwritten. `drain` returns the values pushed since
+    the previous drain (at most `capacity` of them).
+    """
+
+    __slots__ = ("capacity", "_values", "_next", "_size", "_pending")
+
+    def __init__(self, capacity: int) -> None:
+        if capacity <= 0:
+            raise ValueError(f"Capacity must be positive: {capacity}")
+        self.capacity = capacity
+        self._values = array("d", bytes(8 * capacity))
+        self._next = 0
+        self._size = 0
+        self._pending = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def push(self, value: float) -> None:
+        """Append a value, overwriting the oldest one when full."""
+        self._values[self._next] = value
+        self._next = (self._next + 1) % self.capacity
+        if self._size < self.capacity:
+            self._size += 1
+        if self._pending < self.capacity:
+            self._pending += 1
+
+    def latest(self, count: int) -> array:
+        """Return up to `count` most recent values, oldest first."""
+        count = min(count, self._size)
+        start = (self._next - count) % self.capacity
+        if start + count <= self.capacity:
+            return self._values[start : start + count]
+        return self._values[start:] + self._values[: self._next]
+
+    def drain(self) -> array:
+        """Return values pushed since the last drain and reset the pending count."""
+        values = self.latest(self._pending)
+        self._pending = 0
+        return values
@@ -0,0 +1,51 @@
+"""Bounded JSON-RPC envelope checks for responses that are streamed, not decoded."""
+
+import re
+from typing import Optional, Tuple
+
+import aiohttp
+
+ENVELOPE_SCAN_LIMIT = 4096
+STREAM_CHUNK_SIZE = 64 * 1024
+
+_ENVELOPE_KEY = re.compile(rb'"(result|error)"\s*:\s*(\S)?')
+
+
+def scan_envelope(head: bytes) -> Optional[str]:
+    """
+    Return "result" or "error" for the first JSON-RPC envelope key found in `head`.
+    A `"error": null` member is ignored. None means no key was found yet, or
+    an `"error"` key is not yet followed by the start of its value; `head` is
+    then rescanned once more bytes arrive.
+    """
+    for match in _ENVELOPE_KEY.finditer(head):
+        key = match.group(1)
+        if key == b"error":
+            value_start = match.group(2)
+            if value_start is None:
+                return None
+            if value_start == b"n":
+                continue
+        return key.decode("ascii")
+    return None
+
+
+async def stream_envelope(
+    content: aiohttp.StreamReader, scan_limit: int = ENVELOPE_SCAN_LIMIT
+) -> Tuple[int, Optional[str]]:
+    """
+    Drain a response body in chunks without building the JSON object tree.
+    Only the first `scan_limit` bytes are kept and scanned for the envelope.
+
+    Returns:
+        Tuple[int, Optional[str]]: total body bytes and the envelope outcome.
+    """
+    head = bytearray()
+    total_bytes = 0
+    outcome: Optional[str] = None
+    async for chunk in content.iter_chunked(STREAM_CHUNK_SIZE):
+        total_bytes += len(chunk)
+        if outcome is None and len(head) < scan_limit:
+            head += chunk[: scan_limit - len(head)]
+            outcome = scan_envelope(bytes(head))
+    return total_bytes, outcome
@@ -0,0 +1,158 @@
+"""Columnar sample storage with vectorized aggregation; uses NumPy when installed."""
+
+import math
+from array import array
+from typing import Dict, Mapping, Sequence, Union
+
+try:
+    import numpy as np
+
+    BACKEND = "numpy"
+except ImportError:
+    np = None
+    BACKEND = "array"
+
+DEFAULT_QUANTILES = (0.5, 0.9, 0.99)
+
+Fields = Dict[str, Union[int, float]]
+
+
+def _summarize_numpy(
+    values: Sequence[float], quantiles: Sequence[float], trim_iqr: float
+) -> Fields:
+    column = (
+        np.frombuffer(values, dtype=np.float64)
+        if isinstance(values, array)
+        else np.asarray(values, dtype=np.float64)
+    )
+    total = len(column)
+    if trim_iqr > 0 and total >= 4:
+        q1, q3 = np.percentile(column, (25, 75))
+        spread = (q3 - q1) * trim_iqr
+        column = column[(column >= q1 - spread) & (column <= q3 + spread)]
+
+    fields: Fields = {"min": float(column.min())}
+    for quantile, value in zip(
+        quantiles, np.percentile(column, [q * 100 for q in quantiles])
+    ):
+        fields[f"p{round(quantile * 100):g}"] = float(value)
+    fields["max"] = float(column.max())
+    fields["mean"] = float(column.mean())
+    fields["stddev"] = float(column.std())
+    fields["count"] = len(column)
+    if trim_iqr > 0:
+        fields["outliers"] = total - len(column)
+    return fields
+
+
+def _percentile(ordered: Sequence[float], quantile: float) -> float:
+    rank = quantile * (len(ordered) - 1)
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def _summarize_array(
+    values: Sequence[float], quantiles: Sequence[float], trim_iqr: float
+) -> Fields:
+    ordered = sorted(values)
+    total = len(ordered)
+    if trim_iqr > 0 and total >= 4:
+        q1, q3 = _percentile(ordered, 0.25), _percentile(ordered, 0.75)
+        spread = (q3 - q1) * trim_iqr
+        ordered = [v for v in ordered if q1 - spread <= v <= q3 + spread]
+
+    count = len(ordered)
+    mean = math.fsum(ordered) / count
+    fields: Fields = {"min": ordered[0]}
+    for quantile in quantiles:
+        fields[f"p{round(quantile * 100):g}"] = _percentile(ordered, quantile)
+    fields["max"] = ordered[-1]
+    fields["mean"] = mean
+    fields["stddev"] = math.sqrt(math.fsum((v - mean) ** 2 for v in ordered) / count)
+    fields["count"] = count
+    if trim_iqr > 0:
+        fields["outliers"] = total - count
+    return fields
+
+
+def summarize(
+    values: Sequence[float],
+    quantiles: Sequence[float] = DEFAULT_QUANTILES,
+    trim_iqr: float = 0.0,
+) -> Fields:
+    """
+    Aggregate samples into Influx fields: min, p50, p90, p99, max, mean,
+    stddev and count. With `trim_iqr` > 0, samples outside the Tukey fences
+    (Q1 - k*IQR, Q3 + k*IQR) are dropped first and counted as `outliers`.
+    Percentiles interpolate linearly between closest ranks.
+    """
+    if not values:
+        raise ValueError("No samples recorded")
+    if np is not None:
+        return _summarize_numpy(values, quantiles, trim_iqr)
+    return _summarize_array(values, quantiles, trim_iqr)
+
+
+class SampleStore:
+    """
+    Samples of one collection cycle, one contiguous float64 column per series
+    id. Appending stores a raw double instead of a Python float object, and
+    aggregation runs once per series at export time.
+    """
+
+    __slots__ = ("_columns",)
+
+    def __init__(self) -> None:
+        self._columns: Dict[str, array] = {}
+
+    def __len__(self) -> int:
+        return len(self._columns)
+
+    def append(self, series_id: str, value: float) -> None:
+        """Append one sample to a series."""
+        column = self._columns.get(series_id)
+        if column is None:
+            column = self._columns[series_id] = array("d")
+        column.append(value)
+
+    def count(self, series_id: str) -> int:
+        """Number of samples recorded for a series."""
+        column = self._columns.get(series_id)
+        return len(column) if column is not None else 0
+
+    def values(self, series_id: str) -> array:
+        """The raw sample column of a series (empty if none was recorded)."""
+        return self._columns.get(series_id, array("d"))
+
+    def aggregate(self, series_id: str, trim_iqr: float = 0.0) -> Fields:
+        """Summary fields of a series; see `summarize`."""
+        return summarize(self.values(series_id), trim_iqr=trim_iqr)
+
+    def clear(self) -> None:
+        """Drop all columns."""
+        self._columns.clear()
+
+
+class FieldAverages:
+    """
+    Per-key running means of the extra fields of successive samples (e.g.
+    HTTP phase timings), so a multi-sample line reports them for all samples
+    rather than for the last one.
+    """
+
+    __slots__ = ("_sums", "_counts")
+
+    def __init__(self) -> None:
+        self._sums: Dict[str, float] = {}
+        self._counts: Dict[str, int] = {}
+
+    def add(self, fields: Mapping[str, Union[int, float]]) -> None:
+        """Add the fields of one sample."""
+        for key, value in fields.items():
+            self._sums[key] = self._sums.get(key, 0.0) + value
+            self._counts[key] = self._counts.get(key, 0) + 1
+
+    def averages(self) -> Fields:
+        """Mean of each field over the samples that reported it."""
+        return {key: total / self._counts[key] for key, total in self._sums.items()}
@@ -0,0 +1,261 @@
+"""Long-running collector that keeps one block subscription per provider open.
+
+Usage:
+    python -m common.ws_daemon ethereum
+
+The argument names a module in `api/chains/`; its handler's WebSocket metric
+classes and Grafana settings are reused.
+"""
+
+import asyncio
+import importlib
+import logging
+import os
+import sys
+from typing import Dict, List
+
+from common import json_codec
+from common.arrivals import ArrivalIntervals
+from common.metric_config import MetricLabelKey, MetricLabels
+from common.metric_types import WebSocketMetric
+from common.metrics_handler import MetricsHandler
+from common.propagation import BlockPropagationIndex
+from common.ring_buffer import RingBuffer
+from common.sample_store import summarize
+from common.ws_demux import JsonRpcDemux
+
+
+class ProviderStream:
+    """
+    One provider's open subscription. Every block's arrival latency, its lag
+    behind the fastest provider and the time since the previous block go into
+    fixed-size ring buffers, as do the setup stages of every (re)connection;
+    the connection is re-established on transport failure, while a message
+    that cannot be processed is skipped.
+    """
+
+    # Connections whose setup stages are kept per flush interval.
+    STAGE_BUFFER_SIZE = 256
+
+    def __init__(
+        self, metric: WebSocketMetric, buffer_size: int, reconnect_delay: float
+    ) -> None:
+        self.metric = metric
+        self.buffer = RingBuffer(buffer_size)
+        self.lag_buffer = RingBuffer(buffer_size)
+        self.lag_metric = metric.spawn_series(
+            {}, metric_name="block_propagation_lag_seconds"
+        )
+        self.intervals = ArrivalIntervals(buffer_size)
+        self.interval_metric = metric.spawn_series(
+            {}, metric_name="block_interval_seconds"
+        )
+        self.stage_buffers = [
+            (
+                stage,
+                RingBuffer(self.STAGE_BUFFER_SIZE),
+                metric.spawn_series(
+                    {MetricLabelKey.STAGE: stage},
+                    metric_name="ws_stage_latency_seconds",
+                ),
+            )
+            for stage in WebSocketMetric.STAGES
+        ]
+        self.reconnect_delay = reconnect_delay
+        self.websocket = None
+        self.wire_fields: Dict[str, int] = {}
+
+    async def run(self) -> None:
+        """Keep the subscription open for the lifetime of the daemon."""
+        while True:
+            websocket = None
+            connection = None
+            try:
+                websocket = self.websocket = await self.metric.connect()
+                connection = JsonRpcDemux(
+                    websocket, self.metric.config.ws_max_queue
+                ).start()
+                await self.metric.timed_subscribe(connection)
+                while True:
+                    data = await self.metric.listen_for_data(connection)
+                    if "first_notification" in self.metric.stage_timings:
+                        self.record_stages()
+                    if data is not None:
+                        self.record_block(data)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                await self.metric.handle_error(e)
+            finally:
+                if websocket:
+                    try:
+                        await connection.close()
+                        await websocket.close()
+                    except Exception as e:
+                        logging.error("Error closing websocket: %s", str(e))
+                    self.websocket = None
+                    self.collect_wire_bytes(websocket)
+            await asyncio.sleep(self.reconnect_delay)
+
+    def record_block(self, data) -> None:
+        """
+        Record one block notification. A message that cannot be processed is
+        logged and skipped; only transport and protocol errors, raised while
+        reading, restart the subscription.
+        """
+        try:
+            latency = self.metric.process_data(data)
+            self.intervals.record(self.metric.last_frame.received_at)
+            self.buffer.push(latency)
+            self.record_propagation(data)
+        except Exception as e:
+            logging.error(
+                "Skipping block notification in %s: %s",
+                self.metric.labels.get_prometheus_labels(),
+                str(e),
+            )
+
+    def record_propagation(self, data) -> None:
+        """Push the block's lag behind the fastest provider, if it is tracked."""
+        lag = self.metric.get_propagation_lag(data)
+        if lag is not None:
+            self.lag_buffer.push(lag)
+
+    def record_stages(self) -> None:
+        """Push the setup stage timings of the current connection."""
+        timings = self.metric.pop_stage_timings()
+        for stage, buffer, _ in self.stage_buffers:
+            if stage in timings:
+                buffer.push(timings[stage])
+
+    def collect_wire_bytes(self, websocket) -> None:
+        """Add a connection's byte counts to those of the current interval."""
+        for name, value in self.metric.pop_wire_fields(websocket).items():
+            if name == "ws_compressed":
+                self.wire_fields[name] = value
+            else:
+                self.wire_fields[name] = self.wire_fields.get(name, 0) + value
+
+    async def flush(self) -> List[str]:
+        """
+        Aggregate the values recorded since the previous flush into Influx
+        lines; series without new values are skipped. The latency line also
+        carries the frame size, decode time and socket byte counts of the
+        flushed interval.
+        """
+        lines = []
+        if self.websocket is not None:
+            self.collect_wire_bytes(self.websocket)
+        self.metric.extra_fields = {
+            **self.metric.pop_frame_fields(),
+            **self.wire_fields,
+        }
+        self.wire_fields = {}
+        for buffer, metric in (
+            (self.buffer, self.metric),
+            (self.lag_buffer, self.lag_metric),
+            *((buffer, series) for _, buffer, series in self.stage_buffers),
+        ):
+            values = buffer.drain()
+            if not values:
+                continue
+            await metric.update_metric_summary(
+                summarize(values, trim_iqr=metric.config.sample_trim_iqr)
+            )
+            lines.append(metric.get_influx_format())
+        if await self.metric.report_arrival_intervals(
+            self.intervals, self.interval_metric
+        ):
+            lines.append(self.interval_metric.get_influx_format())
+        return lines
+
+
+class BlockSubscriptionDaemon:
+    """
+    Runs a ProviderStream per provider of a chain and pushes aggregates to
+    Grafana every `flush_interval` seconds.
+    """
+
+    def __init__(
+        self,
+        handler: MetricsHandler,
+        flush_interval: float = 60.0,
+        buffer_size: int = 4096,
+        reconnect_delay: float = 5.0,
+    ) -> None:
+        self.handler = handler
+        self.flush_interval = flush_interval
+        self.buffer_size = buffer_size
+        self.reconnect_delay = reconnect_delay
+        self.streams: List[ProviderStream] = []
+        self.propagation_index = BlockPropagationIndex()
+
+    def create_streams(self, config: dict) -> List[ProviderStream]:
+        """Create one stream per provider endpoint and WebSocket metric class."""
+        streams = []
+        for provider in config.get("providers", []):
+            if provider["blockchain"] != self.handler.blockchain:
+                continue
+            if not provider.get("websocket_endpoint"):
+                continue
+            metric_config = self.handler.get_metric_config(provider)
+            for metric_class, metric_name in self.handler.metrics:
+                if not issubclass(metric_class, WebSocketMetric):
+                    continue
+                metric = metric_class(
+                    metric_name=metric_name,
+                    labels=MetricLabels(
+                        source_region=self.handler.grafana_config["current_region"],
+                        target_region=config.get("region", "default"),
+                        blockchain=self.handler.blockchain,
+                        provider=provider["name"],
+                    ),
+                    config=metric_config,
+                    ws_endpoint=provider["websocket_endpoint"],
+                    dns_cache=self.handler.dns_cache,
+                    propagation_index=self.propagation_index,
+                )
+                streams.append(
+                    ProviderStream(metric, self.buffer_size, self.reconnect_delay)
+                )
+        return streams
+
+    async def flush_forever(self) -> None:
+        """Push aggregated lines for all streams on every interval."""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            flushed = await asyncio.gather(*(s.flush() for s in self.streams))
+            lines = [line for stream_lines in flushed for line in stream_lines]
+            if lines:
+                metrics_text = "\n".join(lines)
+                logging.info("Flushing %d series", len(lines))
+                await self.handler.push_to_grafana(metrics_text)
+
+    async def run(self) -> None:
+        """Open all subscriptions and flush aggregates until cancelled."""
+        config = json_codec.loads(os.getenv("ENDPOINTS"))
+        self.streams = self.create_streams(config)
+        if not self.streams:
+            raise ValueError(
+                f"No WebSocket providers configured for {self.handler.blockchain}"
+            )
+        await asyncio.gather(
+            self.flush_forever(), *(stream.run() for stream in self.streams)
+        )
+
+
+def main() -> None:
+    """Run the daemon for the chain module named on the command line."""
+    logging.basicConfig(level=logging.INFO)
+    module = importlib.import_module(f"api.chains.{sys.argv[1]}")
+    daemon = BlockSubscriptionDaemon(
+        module.handler.metrics_handler,
+        flush_interval=float(os.environ.get("DAEMON_FLUSH_INTERVAL", "60")),
+        buffer_size=int(os.environ.get("DAEMON_BUFFER_SIZE", "4096")),
+        reconnect_delay=float(os.environ.get("DAEMON_RECONNECT_DELAY", "5")),
+    )
+    asyncio.run(daemon.run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""JSON-RPC message demultiplexer for a single WebSocket connection."""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, NamedTuple, Optional
+
+from common import json_codec
+
+
+class Frame(NamedTuple):
+    """A decoded WebSocket message with its receive-side accounting."""
+
+    message: Any
+    size: int
+    decode_seconds: float
+    received_at: float
+
+
+class JsonRpcDemux:
+    """
+    Reads frames from one WebSocket in a background task and routes them:
+    responses by request `id` to the awaiting caller, notifications by
+    subscription id to per-subscription queues. Notifications that arrive
+    before their consumer asks for them are buffered, so several subscriptions
+    and request/response calls can share one socket.
+    """
+
+    # Buffered notifications per subscription when no limit is given; the
+    # oldest is dropped when full.
+    QUEUE_LIMIT = 1024
+
+    def __init__(
+        self, websocket: Any, queue_limit: Optional[int] = QUEUE_LIMIT
+    ) -> None:
+        self.websocket = websocket
+        # 0 or None disables the limit, as for websockets' max_queue.
+        self.queue_limit = queue_limit or 0
+        self._pending: Dict[Any, asyncio.Future] = {}
+        self._queues: Dict[Any, asyncio.Queue] = {}
+        self._reader: Optional[asyncio.Task] = None
+        self._closed_error: Optional[BaseException] = None
+
+    def start(self) -> "JsonRpcDemux":
+        """Start the background reader task."""
+        if self._reader is None:
+            self._reader = asyncio.create_task(self._read_loop())
+        return self
+
+    async def _read_loop(self) -> None:
+        error: BaseException = ConnectionError("WebSocket connection closed")
+        try:
+            async for raw in self.websocket:
+                start_time = time.monotonic()
+                try:
+                    message = json_codec.loads(raw)
+                except Exception as e:
+                    logging.warning("Skipping undecodable WebSocket frame: %s", e)
+                    continue
+                received_at = time.monotonic()
+                self._dispatch(
+                    Frame(message, len(raw), received_at - start_time, received_at)
+                )
+        except asyncio.CancelledError:
+            error = ConnectionError("WebSocket reader stopped")
+            raise
+        except Exception as e:
+            error = e
+        finally:
+            self._fail_all(error)
+
+    def _dispatch(self, frame: Frame) -> None:
+        message = frame.message
+        if not isinstance(message, dict):
+            logging.debug("Dropping non-object WebSocket frame")
+            return
+
+        if "method" not in message and "id" in message:
+            future = self._pending.pop(message["id"], None)
+            if future is not None and not future.done():
+                future.set_result(frame)
+            return
+
+        params = message.get("params")
+        if isinstance(params, dict) and "subscription" in params:
+            queue = self._queue(params["subscription"])
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(frame)
+            return
+
+        logging.debug("Dropping unrouted WebSocket frame: %s", message.get("method"))
+
+    def _fail_all(self, error: BaseException) -> None:
+        self._closed_error = error
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(error)
+        self._pending.clear()
+        for queue in self._queues.values():
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(None)
+
+    def _queue(self, subscription_id: Any) -> asyncio.Queue:
+        queue = self._queues.get(subscription_id)
+        if queue is None:
+            queue = asyncio.Queue(maxsize=self.queue_limit)
+            self._queues[subscription_id] = queue
+        return queue
+
+    async def request(
+        self, message: str, request_id: Any, timeout: Optional[float] = None
+    ) -> Frame:
+        """
+        Send a serialized JSON-RPC request and wait for the response with the
+        same id. `message` must carry `request_id` as its id, and the id must
+        not belong to a request that is still waiting for its response.
+        """
+        if self._closed_error is not None:
+            raise self._closed_error
+        if request_id in self._pending:
+            raise ValueError(f"JSON-RPC request id {request_id!r} is already pending")
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        try:
+            await self.websocket.send(message)
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def next_notification(self, subscription_id: Any) -> Frame:
+        """Wait for the next notification of a subscription."""
+        queue = self._queue(subscription_id)
+        if queue.empty() and self._closed_error is not None:
+            raise self._closed_error
+        frame = await queue.get()
+        if frame is None:
+            raise self._closed_error
+        return frame
+
+    def release(self, subscription_id: Any) -> None:
+        """Forget a subscription and any notifications still buffered for it."""
+        self._queues.pop(subscription_id, None)
+
+    async def close(self) -> None:
+        """Stop the reader task; the socket itself is closed by its owner."""
+        if self._reader is not None and not self._reader.done():
+            self._reader.cancel()
+            try:
+                await self._reader
+            except asyncio.CancelledError:
+                pass
@@ -0,0 +1,49 @@
+"""WebSocket client protocol with wire-level byte accounting."""
+
+from typing import Tuple
+
+from websockets.frames import Opcode
+from websockets.legacy.client import WebSocketClientProtocol
+from websockets.legacy.framing import Frame
+
+
+class ByteCountingClientProtocol(WebSocketClientProtocol):
+    """
+    Client protocol that counts bytes as they cross the socket: received
+    data as read from the transport and sent frames as written, i.e. after
+    permessage-deflate and including frame headers. Handshake bytes are
+    counted on the receive side only.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.bytes_received = 0
+        self.bytes_sent = 0
+
+    def data_received(self, data: bytes) -> None:
+        self.bytes_received += len(data)
+        super().data_received(data)
+
+    def write_frame_sync(self, fin: bool, opcode: int, data: bytes) -> None:
+        frame = Frame(fin, Opcode(opcode), data)
+        if self.debug:
+            self.logger.debug("> %s", frame)
+        frame.write(
+            self._counted_write, mask=self.is_client, extensions=self.extensions
+        )
+
+    def _counted_write(self, data: bytes) -> None:
+        self.bytes_sent += len(data)
+        self.transport.write(data)
+
+    def pop_byte_counts(self) -> Tuple[int, int]:
+        """Return (received, sent) bytes since the previous call and reset them."""
+        counts = (self.bytes_received, self.bytes_sent)
+        self.bytes_received = 0
+        self.bytes_sent = 0
+        return counts
+
+    @property
+    def compressed(self) -> bool:
+        """Whether permessage-deflate was negotiated for this connection."""
+        return bool(self.extensions)
@@ -1,15 +1,15 @@
 """EVM metrics implementation for WebSocket and HTTP endpoints."""
 
-import asyncio
-import json
-import time
 from datetime import datetime, timezone
-from typing import Optional
+from functools import lru_cache
+from typing import Any
 
 from web3 import Web3
 
+from common import json_codec
 from common.metric_config import MetricConfig, MetricLabelKey, MetricLabels
 from common.metric_types import HttpCallLatencyMetricBase, WebSocketMetric
+from common.ws_demux import JsonRpcDemux
 
 
 class WsBlockLatencyMetric(WebSocketMetric):
@@ -18,6 +18,23 @@ class WsBlockLatencyMetric(WebSocketMetric):
     Suitable for serverless invocation: connects, subscribes, collects one message, and disconnects.
     """
 
+    SUBSCRIBE_MESSAGE = json_codec.dumps(
+        {
+            "id": 1,
+            "jsonrpc": "2.0",
+            "method": "eth_subscribe",
+            "params": ["newHeads"],
+        }
+    )
+
+    ROUND_TRIP_PROBES = (
+        (
+            "eth_blockNumber",
+            json_codec.dumps({"id": 10, "jsonrpc": "2.0", "method": "eth_blockNumber"}),
+            10,
+        ),
+    )
+
     def __init__(
         self, metric_name: str, labels: MetricLabels, config: MetricConfig, **kwargs
     ):
@@ -27,51 +44,44 @@ class WsBlockLatencyMetric(WebSocketMetric):
             labels=labels,
             config=config,
             ws_endpoint=ws_endpoint,
+            dns_cache=kwargs.get("dns_cache"),
+            propagation_index=kwargs.get("propagation_index"),
         )
         self.labels.update_label(MetricLabelKey.API_METHOD, "eth_subscribe")
-        self.last_block_hash: Optional[str] = None
 
-    async def subscribe(self, websocket):
+    async def subscribe(self, connection: JsonRpcDemux):
         """
         Subscribe to the newHeads event on the WebSocket endpoint.
         """
-        subscription_msg = json.dumps(
-            {
-                "id": 1,
-                "jsonrpc": "2.0",
-                "method": "eth_subscribe",
-                "params": ["newHeads"],
-            }
+        frame = await connection.request(
+            self.SUBSCRIBE_MESSAGE, request_id=1, timeout=self.config.timeout
         )
-        await websocket.send(subscription_msg)
-        response = await websocket.recv()
-        subscription_data = json.loads(response)
+        subscription_data = frame.message
 
         if subscription_data.get("result") is None:
             raise ValueError("Subscription to newHeads failed")
 
-    async def unsubscribe(self, websocket):
-        # EVM blockchains have no unsubscribe logic; do nothing.
-        pass
+        self.subscription_id = subscription_data["result"]
+
+    async def unsubscribe(self, connection: JsonRpcDemux):
+        # EVM blockchains have no unsubscribe logic; the socket is closed next.
+        connection.release(self.subscription_id)
 
-    async def listen_for_data(self, websocket):
+    async def listen_for_data(self, connection: JsonRpcDemux):
         """
         Listen for a single data message from the WebSocket and process block latency.
         """
-        response = await websocket.recv()
-        response_data = json.loads(response)
-
-        if "params" in response_data:
-            block = response_data["params"]["result"]
-            block_hash = block["hash"]
-
-            # LEGACY: Only process the block if it's not a duplicate
-            if block_hash != self.last_block_hash:
-                self.last_block_hash = block_hash
-                return block
+        frame = await self.next_notification(connection)
+        block = frame.message["params"]["result"]
+        # Only process the block if it's not a duplicate
+        if self.is_new_block(block["hash"]):
+            return block
 
         return None
 
+    def get_block_key(self, block):
+        return block["hash"], int(block["number"], 16)
+
     def process_data(self, block):
         """
         Calculate block latency in seconds.
@@ -88,68 +98,52 @@ class EthCallLatencyMetric(HttpCallLatencyMetricBase):
     """
     Collects transaction latency for endpoints using eth_call to simulate a transaction.
     This metric tracks the time taken for a simulated transaction (eth_call) to be processed by the RPC node.
+    The call goes through the same pooled async HTTP path as the other JSON-RPC metrics.
     """
 
     def __init__(
         self, metric_name: str, labels: MetricLabels, config: MetricConfig, **kwargs
     ):
+        tx_data = kwargs.get("extra_params", {}).get("tx_data")
+        if not tx_data:
+            raise ValueError("Transaction data 'tx_data' is missing in extra_params")
+
         super().__init__(
             metric_name=metric_name,
             labels=labels,
             config=config,
             method="eth_call",
-            method_params=None,
+            method_params=self.build_call_params(
+                tx_data["to"],
+                tx_data["data"],
+                tx_data.get("from", "0x0000000000000000000000000000000000000000"),
+            ),
             **kwargs,
         )
 
-        self.tx_data = kwargs.get("extra_params", {}).get("tx_data")
-        if self.tx_data:
-            self.to_address = Web3.to_checksum_address(self.tx_data["to"])
-            self.data = self.tx_data["data"]
-            self.from_address = self.tx_data.get(
-                "from", "0x0000000000000000000000000000000000000000"
-            )
-            self.labels.update_label(MetricLabelKey.API_METHOD, "eth_call")
-        else:
-            raise ValueError("Transaction data 'tx_data' is missing in extra_params")
-
-    def get_web3_instance(self):
-        """Return a Web3 instance for the HTTP endpoint."""
-        web3 = Web3(
-            Web3.HTTPProvider(self.http_endpoint, {"timeout": self.config.timeout})
-        )
-        if not web3.is_connected():
-            raise ValueError(
-                f"Failed to connect to {self.labels.get_label(MetricLabelKey.PROVIDER)} {self.labels.get_label(MetricLabelKey.BLOCKCHAIN)} node"
-            )
-        return web3
-
-    async def fetch_data(self):
-        """Perform the eth_call request to simulate a transaction and track its processing time."""
-        web3 = self.get_web3_instance()
-        start_time = time.monotonic()
-        # Simulate transaction using eth_call in a separate thread
-        response = await asyncio.to_thread(self.simulate_transaction, web3, self.data)
-        end_time = time.monotonic()
-
-        if response is None:
-            raise ValueError("Response is empty")
-
-        latency = end_time - start_time
-        return latency
-
-    def simulate_transaction(self, web3: Web3, transaction_data):
-        """Simulate the transaction using eth_call and return the result."""
-        call_params = {
-            "from": self.from_address,
-            "to": self.to_address,
-            "data": transaction_data,
-        }
-        result = web3.eth.call(call_params, "latest")
-        return result
+    @staticmethod
+    @lru_cache(maxsize=128)
+    def checksum_address(address: str) -> str:
+        """
+        Checksum an address once per provider config, so repeated invocations
+        in a warm instance skip it.
+        """
+        return Web3.to_checksum_address(address)
 
-    def process_data(self, value):
-        return value
+    @staticmethod
+    def build_call_params(to_address: str, data: str, from_address: str) -> list:
+        """
+        Build eth_call params. A new list is returned on every call so that
+        request payloads never share mutable state.
+        """
+        return [
+            {
+                "from": from_address,
+                "to": EthCallLatencyMetric.checksum_address(to_address),
+                "data": data,
+            },
+            "latest",
+        ]
 
 
 class HttpBlockNumberLatencyMetric(HttpCallLatencyMetricBase):
@@ -186,3 +180,67 @@ class HttpGasPriceLatencyMetric(HttpCallLatencyMetricBase):
             method_params=None,
             **kwargs,
         )
+
+
+class HttpBatchLatencyMetric(HttpCallLatencyMetricBase):
+    """
+    Collects whole-batch latency for `eth_blockNumber`, `eth_gasPrice` and `eth_call`
+    sent as a single JSON-RPC batch array. Per-method success is exported as
+    `<method>_success` fields next to the latency value.
+    """
+
+    # Per-method success needs every response decoded.
+    supports_skip_body = False
+
+    def __init__(
+        self, metric_name: str, labels: MetricLabels, config: MetricConfig, **kwargs
+    ):
+        super().__init__(
+            metric_name=metric_name,
+            labels=labels,
+            config=config,
+            method="batch",
+            method_params=None,
+            **kwargs,
+        )
+        batch = [
+            {"id": 1, "jsonrpc": "2.0", "method": "eth_blockNumber"},
+            {"id": 2, "jsonrpc": "2.0", "method": "eth_gasPrice"},
+        ]
+        tx_data = kwargs.get("extra_params", {}).get("tx_data")
+        if tx_data:
+            batch.append(
+                {
+                    "id": 3,
+                    "jsonrpc": "2.0",
+                    "method": "eth_call",
+                    "params": EthCallLatencyMetric.build_call_params(
+                        tx_data["to"],
+                        tx_data["data"],
+                        tx_data.get(
+                            "from", "0x0000000000000000000000000000000000000000"
+                        ),
+                    ),
+                }
+            )
+        self.batch_methods = {request["id"]: request["method"] for request in batch}
+        self._base_request = batch
+        self._request_body = self.compile_request(batch)
+
+    def validate_response(self, data: Any) -> None:
+        """
+        Match batch responses by id and record per-method success.
+        Raises only when the provider rejected the batch as a whole.
+        """
+        if not isinstance(data, list):
+            raise ValueError(f"Batch request rejected: {data}")
+
+        responses = {item.get("id"): item for item in data if isinstance(item, dict)}
+        for request_id, method in self.batch_methods.items():
+            response = responses.get(request_id)
+            succeeded = (
+                response is not None
+                and response.get("error") is None
+                and "result" in response
+            )
+            self.extra_fields[f"{method}_success"] = int(succeeded)
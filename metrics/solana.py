@@ -1,22 +1,75 @@
 """Solana metrics implementation for WebSocket and HTTP endpoints."""
 
-import json
 import logging
 from datetime import datetime, timezone
-from typing import Any, Dict, Optional
-
-from websockets.client import WebSocketClientProtocol
+from typing import Any, Dict, List, Optional, Tuple
 
+from common import json_codec
 from common.metric_config import MetricConfig, MetricLabelKey, MetricLabels
 from common.metric_types import HttpCallLatencyMetricBase, WebSocketMetric
+from common.ws_demux import JsonRpcDemux
 
 
 class WsBlockLatencyMetric(WebSocketMetric):
     """
     Collects block latency for Solana providers using a WebSocket connection.
     Suitable for serverless invocation: connects, subscribes, collects one message, and disconnects.
+
+    `config.ws_mode` picks the subscription:
+    - full: blockSubscribe with jsonParsed transactions (the default)
+    - light: blockSubscribe without transactions or rewards, same latency
+    - slot / root: slotSubscribe / rootSubscribe; notifications carry no block
+      time, so the value is the slot's arrival lag behind the fastest provider,
+      exported as its own `slot_arrival_lag_seconds` measurement. A single
+      notification says nothing about lag (each provider's first slot is
+      usually one it reports first), so these modes need a sampling window
+      (WS_WINDOW_*) or the daemon.
     """
 
+    SLOT_LAG_METRIC_NAME = "slot_arrival_lag_seconds"
+
+    # mode -> (subscribe method, unsubscribe method, subscribe params)
+    SUBSCRIPTION_MODES: Dict[str, Tuple[str, str, List[Any]]] = {
+        "full": (
+            "blockSubscribe",
+            "blockUnsubscribe",
+            ["all", {"commitment": "confirmed", "encoding": "jsonParsed"}],
+        ),
+        "light": (
+            "blockSubscribe",
+            "blockUnsubscribe",
+            [
+                "all",
+                {
+                    "commitment": "confirmed",
+                    "encoding": "base64",
+                    "transactionDetails": "none",
+                    "showRewards": False,
+                    "maxSupportedTransactionVersion": 0,
+                },
+            ],
+        ),
+        "slot": ("slotSubscribe", "slotUnsubscribe", []),
+        "root": ("rootSubscribe", "rootUnsubscribe", []),
+    }
+
+    SLOT_MODES = ("slot", "root")
+
+    SUBSCRIBE_MESSAGES = {
+        mode: json_codec.dumps(
+            {"jsonrpc": "2.0", "id": 1, "method": method, "params": params}
+        )
+        for mode, (method, _, params) in SUBSCRIPTION_MODES.items()
+    }
+
+    ROUND_TRIP_PROBES = (
+        (
+            "getSlot",
+            json_codec.dumps({"jsonrpc": "2.0", "id": 10, "method": "getSlot"}),
+            10,
+        ),
+    )
+
     def __init__(
         self,
         metric_name: str,
@@ -30,80 +83,114 @@ class WsBlockLatencyMetric(WebSocketMetric):
             labels=labels,
             config=config,
             ws_endpoint=ws_endpoint,
+            dns_cache=kwargs.get("dns_cache"),
+            propagation_index=kwargs.get("propagation_index"),
         )
-        self.labels.update_label(MetricLabelKey.API_METHOD, "blockSubscribe")
-        self.last_block_hash: Optional[str] = None
+        if config.ws_mode not in self.SUBSCRIPTION_MODES:
+            raise ValueError(f"Unsupported Solana WebSocket mode: {config.ws_mode}")
+        self.mode = config.ws_mode
+        self.subscribe_method, self.unsubscribe_method, _ = self.SUBSCRIPTION_MODES[
+            self.mode
+        ]
+        self.labels.update_label(MetricLabelKey.API_METHOD, self.subscribe_method)
+        if self.mode in self.SLOT_MODES:
+            self.metric_name = self.SLOT_LAG_METRIC_NAME
 
-    async def subscribe(self, websocket: WebSocketClientProtocol) -> None:
+    async def collect_metric(self) -> None:
+        if self.mode in self.SLOT_MODES and self.get_sampling_window()[0] <= 1:
+            await self.handle_error(
+                ValueError(
+                    f"{self.mode} mode needs a sampling window (WS_WINDOW_*) "
+                    "or the WebSocket daemon"
+                )
+            )
+            return
+        await super().collect_metric()
+
+    async def subscribe(self, connection: JsonRpcDemux) -> None:
         """
-        Subscribe to the newBlocks event on the WebSocket endpoint.
+        Subscribe to blocks, slots or roots depending on the configured mode.
         """
-        subscription_msg: str = json.dumps(
-            {
-                "jsonrpc": "2.0",
-                "id": 1,
-                "method": "blockSubscribe",
-                "params": [
-                    {
-                        "commitment": "confirmed",
-                        "encoding": "jsonParsed",
-                    }
-                ],
-            }
+        frame = await connection.request(
+            self.SUBSCRIBE_MESSAGES[self.mode],
+            request_id=1,
+            timeout=self.config.timeout,
         )
-        await websocket.send(subscription_msg)
-        response: str = await websocket.recv()
-        subscription_data: Dict[str, Any] = json.loads(response)
+        subscription_data: Dict[str, Any] = frame.message
 
         if subscription_data.get("result") is None:
-            raise ValueError("Subscription to new blocks failed")
+            raise ValueError(f"{self.subscribe_method} subscription failed")
 
         self.subscription_id = subscription_data.get("result")
 
-    async def unsubscribe(self, websocket: WebSocketClientProtocol) -> None:
+    async def unsubscribe(self, connection: JsonRpcDemux) -> None:
         """
-        Unsubscribe from the block subscription.
+        Unsubscribe from the active subscription.
         """
-        unsubscribe_msg: str = json.dumps(
+        connection.release(self.subscription_id)
+        unsubscribe_msg: str = json_codec.dumps(
             {
                 "jsonrpc": "2.0",
-                "id": 1,
-                "method": "blockUnsubscribe",
+                "id": 2,
+                "method": self.unsubscribe_method,
                 "params": [self.subscription_id],
             }
         )
-        await websocket.send(unsubscribe_msg)
-        response = await websocket.recv()
-        response_data = json.loads(response)
+        frame = await connection.request(
+            unsubscribe_msg, request_id=2, timeout=self.config.timeout
+        )
+        response_data: Dict[str, Any] = frame.message
 
         if not response_data.get("result", False):
             logging.warning("Unsubscribe call failed or returned false")
         else:
-            logging.debug("Successfully unsubscribed from block subscription")
+            logging.debug("Successfully unsubscribed from %s", self.subscribe_method)
 
     async def listen_for_data(
-        self, websocket: WebSocketClientProtocol
+        self, connection: JsonRpcDemux
     ) -> Optional[Dict[str, Any]]:
         """
         Listen for a single data message from the WebSocket and process block latency.
+        Slot and root notifications are returned as {"slot": <slot>}.
         """
-        response: str = await websocket.recv()
-        response_data: Dict[str, Any] = json.loads(response)
-
-        if "params" in response_data:
-            block = response_data["params"]["result"]
-            block_hash: str = block.get("blockhash")
+        frame = await self.next_notification(connection)
+        result = frame.message["params"]["result"]
+        if self.mode == "root":
+            block = {"slot": result}
+        elif self.mode == "slot":
+            block = {"slot": result.get("slot")}
+        else:
+            # blockNotification carries the block under result.value.block
+            block = result["value"].get("block") or {}
 
-            if block_hash and block_hash != self.last_block_hash:
-                self.last_block_hash = block_hash
-                return block
+        block_hash, _ = self.get_block_key(block)
+        if self.is_new_block(block_hash):
+            return block
 
         return None
 
+    def get_block_key(
+        self, block_info: Dict[str, Any]
+    ) -> Tuple[Optional[str], Optional[int]]:
+        if self.mode in self.SLOT_MODES:
+            slot = block_info.get("slot")
+            return (str(slot) if slot is not None else None), slot
+        return block_info.get("blockhash"), block_info.get("blockHeight")
+
+    def get_propagation_lag(self, block_info: Dict[str, Any]) -> Optional[float]:
+        # In slot and root modes the lag is the metric value itself, recorded
+        # by process_data; a separate lag series would duplicate it.
+        if self.mode in self.SLOT_MODES:
+            return None
+        return super().get_propagation_lag(block_info)
+
     def process_data(self, block_info: Dict[str, Any]) -> float:
         """
         Calculate block latency in seconds.
         """
+        if self.mode in self.SLOT_MODES:
+            return self.slot_arrival_lag(block_info)
+
         block_time: Optional[int] = block_info.get("blockTime")
 
         if block_time is None:
@@ -114,6 +201,21 @@ class WsBlockLatencyMetric(WebSocketMetric):
         latency: float = (current_time - block_datetime).total_seconds()
         return latency
 
+    def slot_arrival_lag(self, block_info: Dict[str, Any]) -> float:
+        """
+        Seconds between the fastest provider's notification of this slot and
+        ours; needs the propagation index shared by the chain's providers.
+        """
+        if self.propagation_index is None:
+            raise ValueError(f"{self.mode} mode requires a propagation index")
+        slot_key, slot = self.get_block_key(block_info)
+        if slot is None:
+            raise ValueError("Slot missing in notification")
+        lag = self.propagation_index.record(slot_key, slot, self.last_frame.received_at)
+        if lag is None:
+            raise ValueError(f"Slot {slot} is older than the tracked window")
+        return lag
+
 
 class HttpGetRecentBlockhashLatencyMetric(HttpCallLatencyMetricBase):
     """
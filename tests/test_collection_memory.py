@@ -0,0 +1,58 @@
+"""Memory stays flat across MetricCollection cycles on a warm instance."""
+
+import asyncio
+import gc
+import json
+import tracemalloc
+
+from api.chains.ethereum import handler
+from common.collection import MetricCollection
+
+CYCLES = 10_000
+
+ENDPOINTS = json.dumps(
+    {
+        "providers": [
+            {
+                "blockchain": "Ethereum",
+                "name": f"provider-{index}",
+                "http_endpoint": "http://127.0.0.1:1/",
+                "websocket_endpoint": "ws://127.0.0.1:1",
+                "data": {"to": "0x" + "00" * 20, "data": "0x"},
+            }
+            for index in range(3)
+        ]
+    }
+)
+
+
+async def run_cycle(metrics_handler) -> None:
+    plan = metrics_handler.get_collection_plan(ENDPOINTS)
+    with MetricCollection() as collection:
+        for planned_metrics in plan.metrics:
+            for planned in planned_metrics:
+                metric = planned.create(collection)
+                await metric.update_metric_value(0.1)
+                await metric.update_metric_value(0.2)
+                metric.spawn_series({}, metric_name="extra_series")
+
+
+def test_memory_is_flat_over_collection_cycles():
+    async def run():
+        metrics_handler = handler.metrics_handler
+        for _ in range(100):
+            await run_cycle(metrics_handler)
+        gc.collect()
+        tracemalloc.start()
+        try:
+            baseline = tracemalloc.get_traced_memory()[0]
+            for _ in range(CYCLES):
+                await run_cycle(metrics_handler)
+            gc.collect()
+            return tracemalloc.get_traced_memory()[0] - baseline
+        finally:
+            tracemalloc.stop()
+
+    growth = asyncio.run(run())
+    # A leaked metric per cycle would add megabytes; allow allocator noise.
+    assert growth < 64 * 1024, f"memory grew by {growth} bytes over {CYCLES} cycles"
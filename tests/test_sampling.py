@@ -0,0 +1,72 @@
+"""Multi-sample HTTP metrics export summary and per-phase fields over all samples."""
+
+import asyncio
+
+from aiohttp import web
+
+from common.collection import MetricCollection
+from common.http_session import HttpSessionManager
+from common.influx import InfluxEncoder
+from common.metric_config import MetricConfig, MetricLabels
+from metrics.evm import HttpBlockNumberLatencyMetric
+
+
+def collect_line(statuses, samples=3):
+    replies = iter(statuses)
+
+    async def rpc(request):
+        await request.read()
+        status = next(replies)
+        if status != 200:
+            return web.Response(status=status)
+        return web.json_response({"jsonrpc": "2.0", "id": 1, "result": "0x1"})
+
+    async def run():
+        app = web.Application()
+        app.router.add_post("/", rpc)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        try:
+            async with HttpSessionManager() as session_manager:
+                with MetricCollection() as collection:
+                    metric = collection.add(
+                        HttpBlockNumberLatencyMetric(
+                            metric_name="response_latency_seconds",
+                            labels=MetricLabels("test", "test", "Ethereum", "local"),
+                            config=MetricConfig(
+                                timeout=5, max_latency=60, samples=samples
+                            ),
+                            http_endpoint=f"http://127.0.0.1:{port}/",
+                            session_manager=session_manager,
+                        )
+                    )
+                    await metric.collect_metric()
+                    encoder = InfluxEncoder()
+                    collection.write_influx(encoder)
+                    return encoder.getvalue()
+        finally:
+            await runner.cleanup()
+
+    return asyncio.run(run())
+
+
+def fields_of(line):
+    field_set = line.split(" ")[1]
+    return dict(pair.split("=") for pair in field_set.split(","))
+
+
+def test_phase_fields_cover_every_sample():
+    fields = fields_of(collect_line([200, 200, 200]))
+    assert fields["count"] == "3"
+    # Only the first sample opens a connection; the mean keeps its cost.
+    assert float(fields["connect_seconds"]) > 0
+
+
+def test_single_successful_sample_still_exports_summary():
+    fields = fields_of(collect_line([500, 200, 500]))
+    assert "value" not in fields
+    assert fields["count"] == "1"
+    assert fields["p50"] == fields["max"]
@@ -0,0 +1,87 @@
+"""WebSocket connects through the DNS cache keep TLS bound to the hostname."""
+
+import asyncio
+import math
+import shutil
+import socket
+import ssl
+import subprocess
+
+import pytest
+import websockets
+
+from common.dns_cache import DnsCache
+from common.metric_config import MetricConfig, MetricLabels
+from metrics.evm import WsBlockLatencyMetric
+
+
+@pytest.fixture(scope="module")
+def localhost_cert(tmp_path_factory):
+    if shutil.which("openssl") is None:
+        pytest.skip("openssl is not installed")
+    directory = tmp_path_factory.mktemp("tls")
+    cert, key = directory / "cert.pem", directory / "key.pem"
+    subprocess.run(
+        [
+            "openssl",
+            "req",
+            "-x509",
+            "-newkey",
+            "rsa:2048",
+            "-nodes",
+            "-days",
+            "1",
+            "-subj",
+            "/CN=localhost",
+            "-addext",
+            "subjectAltName=DNS:localhost",
+            "-keyout",
+            str(key),
+            "-out",
+            str(cert),
+        ],
+        check=True,
+        capture_output=True,
+    )
+    return cert, key
+
+
+def connect_through_cache(cert, key, addresses):
+    async def echo(websocket):
+        async for message in websocket:
+            await websocket.send(message)
+
+    async def run():
+        server_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        server_context.load_cert_chain(cert, key)
+        async with websockets.serve(echo, "127.0.0.1", 0, ssl=server_context) as server:
+            port = server.sockets[0].getsockname()[1]
+            dns_cache = DnsCache()
+            dns_cache._entries["localhost"] = (math.inf, addresses)
+            metric = WsBlockLatencyMetric(
+                metric_name="ws_block_latency",
+                labels=MetricLabels("test", "test", "Ethereum", "local"),
+                config=MetricConfig(timeout=5, max_latency=60),
+                ws_endpoint=f"wss://localhost:{port}",
+                dns_cache=dns_cache,
+            )
+            websocket = await metric.connect()
+            await websocket.send("ping")
+            reply = await websocket.recv()
+            await websocket.close()
+            return reply
+
+    return asyncio.run(run())
+
+
+def test_wss_connect_verifies_hostname_with_cached_address(localhost_cert, monkeypatch):
+    cert, key = localhost_cert
+    monkeypatch.setenv("SSL_CERT_FILE", str(cert))
+    assert connect_through_cache(cert, key, [(socket.AF_INET, "127.0.0.1")]) == "ping"
+
+
+def test_wss_connect_falls_back_to_next_cached_address(localhost_cert, monkeypatch):
+    cert, key = localhost_cert
+    monkeypatch.setenv("SSL_CERT_FILE", str(cert))
+    addresses = [(socket.AF_INET, "127.0.0.2"), (socket.AF_INET, "127.0.0.1")]
+    assert connect_through_cache(cert, key, addresses) == "ping"
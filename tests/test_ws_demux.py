@@ -0,0 +1,73 @@
+"""JsonRpcDemux routing over a scripted socket."""
+
+import asyncio
+
+import pytest
+
+from common.ws_demux import JsonRpcDemux
+
+
+class ScriptedSocket:
+    """Yields queued frames to the demux and records sent messages."""
+
+    def __init__(self) -> None:
+        self.incoming: asyncio.Queue = asyncio.Queue()
+        self.sent = []
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        raw = await self.incoming.get()
+        if raw is None:
+            raise StopAsyncIteration
+        return raw
+
+    async def send(self, message: str) -> None:
+        self.sent.append(message)
+
+
+def test_duplicate_pending_request_id_is_rejected():
+    async def run():
+        demux = JsonRpcDemux(ScriptedSocket()).start()
+        first = asyncio.create_task(demux.request('{"id":1}', request_id=1))
+        await asyncio.sleep(0)
+        with pytest.raises(ValueError):
+            await demux.request('{"id":1}', request_id=1)
+        demux.websocket.incoming.put_nowait('{"jsonrpc":"2.0","id":1,"result":7}')
+        assert (await first).message["result"] == 7
+        await demux.close()
+
+    asyncio.run(run())
+
+
+def test_undecodable_frame_is_skipped():
+    async def run():
+        socket = ScriptedSocket()
+        demux = JsonRpcDemux(socket).start()
+        socket.incoming.put_nowait("{not json")
+        socket.incoming.put_nowait(
+            '{"jsonrpc":"2.0","method":"n","params":{"subscription":5,"result":1}}'
+        )
+        frame = await asyncio.wait_for(demux.next_notification(5), 1)
+        assert frame.message["params"]["result"] == 1
+        await demux.close()
+
+    asyncio.run(run())
+
+
+def test_notification_queue_is_bounded_by_limit():
+    async def run():
+        socket = ScriptedSocket()
+        demux = JsonRpcDemux(socket, queue_limit=2).start()
+        for value in range(5):
+            socket.incoming.put_nowait(
+                '{"method":"n","params":{"subscription":5,"result":%d}}' % value
+            )
+        await asyncio.sleep(0.01)
+        results = [(await demux.next_notification(5)).message["params"]["result"]]
+        results.append((await demux.next_notification(5)).message["params"]["result"])
+        assert results == [3, 4]
+        await demux.close()
+
+    asyncio.run(run())